@@ -1,24 +1,68 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from okdata.aws.logging import add_fastapi_logging
+from okdata.aws.logging import add_fastapi_logging, log_add
 from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
+from dataplatform_keycloak.call_stats import call_stats_scope, instrument_requests
+from dataplatform_keycloak.request_cache import request_scope
 from resources import my_permissions, permissions, resources, teams
+from resources.compression import CompressionMiddleware
+from resources.etag import ETagMiddleware
 from resources.errors import ErrorResponse, error_message_models
+from resources.warmup import warm_up
 
 root_path = os.environ.get("ROOT_PATH", "")
+server_timing_enabled = os.environ.get("SERVER_TIMING_ENABLED") == "true"
+
+instrument_requests()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mangum runs the lifespan on every invocation, but only the first one in
+    # a container does any work. Warm-up blocks, so keep it off the event loop.
+    await run_in_threadpool(warm_up)
+    yield
+
+
 app = FastAPI(
     title="Okdata Permission API",
     description="API for managing permissions to okdata resources such as datasets",
     version="0.2.0",
     root_path=root_path,
+    lifespan=lifespan,
 )
 
 add_fastapi_logging(app)
 
+
+@app.middleware("http")
+async def upstream_request_scope(request: Request, call_next):
+    """Memoize Keycloak reads and account for upstream calls per request."""
+    with call_stats_scope() as call_stats, request_scope() as request_cache:
+        response = await call_next(request)
+
+    log_add(
+        request_cache_hits=request_cache.hits,
+        upstream_calls=call_stats.calls,
+        upstream_duration_ms=call_stats.duration_ms,
+    )
+    if server_timing_enabled and call_stats.calls:
+        response.headers["Server-Timing"] = call_stats.server_timing()
+
+    return response
+
+
+# The middleware added last runs first, so responses are tagged before they're
+# compressed.
+app.add_middleware(ETagMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(
     permissions.router,
     prefix="/permissions",
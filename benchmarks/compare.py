@@ -0,0 +1,22 @@
+"""Compare two saved benchmark runs.
+
+Usage: python -m benchmarks.compare BASE.json NEW.json [--key p95_ms]
+"""
+
+import argparse
+
+from benchmarks.report import SUMMARY_KEYS, format_comparison, load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--key", choices=SUMMARY_KEYS, default="p50_ms")
+    args = parser.parse_args()
+
+    print(format_comparison(load(args.base), load(args.new), args.key))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmarks of response compression for large listings.
+
+Each payload is served through `CompressionMiddleware` with every supported
+content coding, reporting the latency and the number of bytes sent.
+
+Usage: python -m benchmarks.compression [--sizes 100,1000,10000]
+                                        [--repeat N] [--output FILE]
+                                        [--compare BASE.json]
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.report import format_comparison, format_table, load, save, summarize
+from benchmarks.serialization import payloads, timed_samples
+from resources import compression
+from resources.compression import CompressionMiddleware
+from resources.responses import FastJSONResponse
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def make_client(content):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/")
+    def get():
+        return FastJSONResponse(content)
+
+    return TestClient(app)
+
+
+def run(sizes, repeat):
+    """Serve every payload at every size and return the results."""
+    results = {}
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli else [])
+
+    for n in sizes:
+        for name, content in payloads(n).items():
+            client = make_client(content)
+            identity_size = None
+
+            for encoding in encodings:
+                headers = {"Accept-Encoding": encoding}
+                response = client.get("/", headers=headers)
+                size = int(response.headers["Content-Length"])
+                identity_size = identity_size or size
+
+                samples = timed_samples(
+                    lambda: client.get("/", headers=headers), repeat
+                )
+                results[f"{name} {encoding} n={n}"] = {
+                    **summarize(samples),
+                    "size_kb": size / 1024,
+                    "ratio": identity_size / size,
+                }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000",
+        help="comma separated numbers of items per payload",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="where to save the results as JSON")
+    parser.add_argument("--compare", help="earlier results to compare with")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.repeat)
+
+    print(format_table(results, ["size_kb", "ratio"]))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"compression-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save(results, output, sizes=sizes, repeat=args.repeat)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print()
+        print(format_comparison(load(args.compare), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Latency and upstream call benchmarks for every API endpoint.
+
+The app is driven through `fastapi.testclient.TestClient` against an
+in-memory Keycloak stub with injected latency, so results are reproducible
+and don't need network access.
+
+Usage: python -m benchmarks.endpoints [--iterations N] [--latency-ms MS]
+                                      [--output FILE] [--compare BASE.json]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.report import format_comparison, format_table, load, save, summarize
+from models.scope import all_scopes_for_type, scope_permission
+from tests.keycloak_stub import KeycloakStub
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+RESOURCE_TYPE = "okdata:dataset"
+OWNER = "janedoe"
+SUPERUSER = "superuser"
+
+
+def populate(stub, teams=20, users=200, datasets=50):
+    """Fill `stub` with a realm resembling production, only smaller.
+
+    Return a dict of IDs and names used by the scenarios.
+    """
+    team_ids = [
+        stub.add_group(
+            f"TEAM-team{i}",
+            attributes={"email": [f"team{i}@example.org"]},
+            realm_roles=["origo-team"] if i % 2 else [],
+        )
+        for i in range(teams)
+    ]
+    for i in range(users):
+        stub.add_user(
+            f"user{i}",
+            groups=[team_ids[i % teams]],
+            firstName="User",
+            lastName=str(i),
+        )
+    stub.add_user(OWNER, groups=team_ids[:3], firstName="Jane", lastName="Doe")
+    stub.add_user(SUPERUSER)
+    stub.grant_scope("keycloak:resource:admin", SUPERUSER)
+
+    scopes = all_scopes_for_type(RESOURCE_TYPE)
+    dataset_names = [f"{RESOURCE_TYPE}:dataset-{i}" for i in range(datasets)]
+    for name in dataset_names:
+        resource_id = stub.add_resource(name, RESOURCE_TYPE, scopes)
+        for scope in scopes:
+            stub.add_permission(
+                f"{name}:{scope_permission(scope)}",
+                resource_id,
+                [scope],
+                users=[OWNER],
+                groups=["TEAM-team0"] if scope.endswith(":read") else [],
+            )
+
+    return {
+        "team_ids": team_ids,
+        "team_members": [f"user{i}" for i in range(0, users, teams)] + [OWNER],
+        "datasets": dataset_names,
+        "usernames": [f"user{i}" for i in range(50)],
+    }
+
+
+def scenarios(realm):
+    """Return a dict of benchmark name to `(username, request factory)`.
+
+    Request factories are called with the iteration number, and return the
+    `TestClient.request` arguments. Repeated requests leave the realm as it
+    was, except for the creation and deletion of resources (which are run
+    in that order).
+    """
+    team_id = realm["team_ids"][0]
+    dataset = realm["datasets"][0]
+
+    return {
+        "GET /permissions/{resource_name}": (
+            OWNER,
+            lambda i: ("GET", f"/permissions/{dataset}", {}),
+        ),
+        "PUT /permissions/{resource_name}": (
+            OWNER,
+            lambda i: (
+                "PUT",
+                f"/permissions/{dataset}",
+                {
+                    "json": {
+                        "add_users": [{"user_id": "user1", "user_type": "user"}],
+                        "scope": f"{RESOURCE_TYPE}:read",
+                    }
+                },
+            ),
+        ),
+        "POST /permissions": (
+            SUPERUSER,
+            lambda i: (
+                "POST",
+                "/permissions",
+                {
+                    "json": {
+                        "owner": {"user_id": OWNER, "user_type": "user"},
+                        "resource_name": f"{RESOURCE_TYPE}:bench-{i}",
+                    }
+                },
+            ),
+        ),
+        "DELETE /permissions/{resource_name}": (
+            SUPERUSER,
+            lambda i: ("DELETE", f"/permissions/{RESOURCE_TYPE}:bench-{i}", {}),
+        ),
+        "GET /my_permissions": (OWNER, lambda i: ("GET", "/my_permissions", {})),
+        "GET /teams": (OWNER, lambda i: ("GET", "/teams", {})),
+        "GET /teams?include=all": (
+            OWNER,
+            lambda i: ("GET", "/teams?include=all", {}),
+        ),
+        "GET /teams?ids=...": (
+            OWNER,
+            lambda i: ("GET", f"/teams?ids={','.join(realm['team_ids'][:10])}", {}),
+        ),
+        "GET /teams/{team_id}": (OWNER, lambda i: ("GET", f"/teams/{team_id}", {})),
+        "GET /teams/name/{team_name}": (
+            OWNER,
+            lambda i: ("GET", "/teams/name/team0", {}),
+        ),
+        "GET /teams/{team_id}/members": (
+            OWNER,
+            lambda i: ("GET", f"/teams/{team_id}/members", {}),
+        ),
+        "PATCH /teams/{team_id}": (
+            OWNER,
+            lambda i: (
+                "PATCH",
+                f"/teams/{team_id}",
+                {"json": {"attributes": {"email": ["team0@example.org"]}}},
+            ),
+        ),
+        "PUT /teams/{team_id}/members": (
+            OWNER,
+            lambda i: (
+                "PUT",
+                f"/teams/{team_id}/members",
+                {"json": realm["team_members"]},
+            ),
+        ),
+        "GET /teams/users/{username}": (
+            OWNER,
+            lambda i: ("GET", "/teams/users/user1", {}),
+        ),
+        "GET /teams/users/{username}/teams": (
+            OWNER,
+            lambda i: ("GET", "/teams/users/user1/teams", {}),
+        ),
+        "POST /teams/users:lookup": (
+            OWNER,
+            lambda i: (
+                "POST",
+                "/teams/users:lookup",
+                {"json": {"usernames": realm["usernames"]}},
+            ),
+        ),
+    }
+
+
+def run(stub, client, realm, iterations, warmup):
+    """Run every scenario and return the results."""
+    results = {}
+
+    for name, (username, request) in scenarios(realm).items():
+        headers = {"Authorization": f"Bearer {stub.token_for(username)}"}
+        samples = []
+        calls = Counter()
+        errors = 0
+
+        for i in range(warmup + iterations):
+            method, url, kwargs = request(i)
+            calls_before = stub.calls.copy()
+            start = time.perf_counter()
+            response = client.request(method, url, headers=headers, **kwargs)
+            duration_ms = (time.perf_counter() - start) * 1000
+
+            if response.status_code >= 400:
+                errors += 1
+                if errors == 1:
+                    print(f"{name}: {response.status_code} {response.text}")
+
+            if i >= warmup:
+                samples.append(duration_ms)
+                calls.update(stub.calls - calls_before)
+
+        results[name] = {
+            **summarize(samples),
+            "errors": errors,
+            "upstream_calls": sum(calls.values()) / iterations,
+            "upstream_calls_by_endpoint": {
+                endpoint: count / iterations for endpoint, count in calls.items()
+            },
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=5,
+        help="latency added to every Keycloak call",
+    )
+    parser.add_argument("--output", help="where to save the results as JSON")
+    parser.add_argument("--compare", help="earlier results to compare with")
+    args = parser.parse_args()
+
+    stub = KeycloakStub(latency={"default": args.latency_ms / 1000})
+    realm = populate(stub)
+
+    # The app reads its configuration when imported.
+    os.environ.pop("KEYCLOAK_TEAM_ADMIN_SERVER", None)
+    os.environ.update(stub.environ())
+    from fastapi.testclient import TestClient
+
+    from app import app
+
+    with stub:
+        results = run(stub, TestClient(app), realm, args.iterations, args.warmup)
+
+    print(format_table(results, ["upstream_calls"]))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"endpoints-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save(
+        results,
+        output,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        latency_ms=args.latency_ms,
+    )
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print()
+        print(format_comparison(load(args.compare), results))
+
+
+if __name__ == "__main__":
+    main()
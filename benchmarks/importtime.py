@@ -0,0 +1,126 @@
+"""Import time of the Lambda entry points, measured with `-X importtime`.
+
+Every module is imported in a fresh interpreter, a number of times. The
+cumulative import time of each is compared with its budget, and the
+heaviest imports below it are listed.
+
+Usage: python -m benchmarks.importtime [--repeat N] [--top N]
+                                       [--output FILE] [--compare BASE.json]
+
+Exits with status 1 if the median import time of any module is over budget.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from benchmarks.report import format_comparison, format_table, load, save, summarize
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Median import time budgets in milliseconds, with some headroom over what
+# they were when set (460 ms for `handler`, 390 ms for the jobs).
+BUDGETS_MS = {
+    "handler": 550,
+    "jobs.backup": 500,
+    "jobs.monitor": 500,
+}
+
+# Dummy configuration needed by the modules at import time.
+ENVIRON = {
+    "AWS_REGION": "eu-west-1",
+    "BACKUP_BUCKET_NAME": "backup-bucket",
+    "ROOT_PATH": "",
+    "SERVICE_NAME": "okdata-permission-api",
+}
+
+
+def parse_importtime(output):
+    """Return a dict of module name to cumulative import time in ms.
+
+    `output` is what `python -X importtime` writes to stderr.
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def profile(module):
+    """Import `module` in a fresh interpreter and return its import times."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, **ENVIRON},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(process.stderr)
+
+
+def run(repeat, top):
+    """Profile every budgeted module and return the results."""
+    results = {}
+
+    for module in BUDGETS_MS:
+        profiles = [profile(module) for _ in range(repeat)]
+        results[module] = {
+            **summarize([times[module] for times in profiles]),
+            "budget_ms": BUDGETS_MS[module],
+        }
+
+        heaviest = sorted(
+            (name for name in profiles[0] if name != module),
+            key=lambda name: profiles[0][name],
+            reverse=True,
+        )
+        for name in heaviest[:top]:
+            results[f"{module} > {name}"] = summarize(
+                [times.get(name, 0) for times in profiles]
+            )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of heavy imports to list"
+    )
+    parser.add_argument("--output", help="where to save the results as JSON")
+    parser.add_argument("--compare", help="earlier results to compare with")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.top)
+
+    print(format_table(results, ["budget_ms"]))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"importtime-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save(results, output, repeat=args.repeat)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print()
+        print(format_comparison(load(args.compare), results))
+
+    over_budget = [
+        module
+        for module, budget_ms in BUDGETS_MS.items()
+        if results[module]["p50_ms"] > budget_ms
+    ]
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""CPU benchmarks for converting Keycloak data to API models.
+
+Each benchmark converts a listing of N items, both with full pydantic
+validation and through the constructors that skip it for trusted Keycloak
+data.
+
+`GET /permissions/{resource_name}` is measured as a whole too, compared
+with returning the same models through its `response_model`, which
+validates them again.
+
+Usage: python -m benchmarks.models [--sizes 1000,10000,100000] [--repeat N]
+                                   [--output FILE] [--compare BASE.json]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.report import format_comparison, format_table, load, save, summarize
+from models import OkdataPermission, Team, TeamMember
+from resources import permissions
+from resources.authorizer import AuthInfo, resource_authorizer
+from resources.responses import FastJSONResponse
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def uma_permissions(n):
+    return [
+        {
+            "id": str(i),
+            "name": f"okdata:dataset:dataset-{i}:read",
+            "description": f"Allows reading the dataset `dataset-{i}`.",
+            "scopes": ["okdata:dataset:read"],
+            "groups": ["/TEAM-team0", "/TEAM-team1"],
+            "users": ["janedoe", f"user{i}"],
+            "clients": [],
+            "logic": "POSITIVE",
+            "decisionStrategy": "AFFIRMATIVE",
+        }
+        for i in range(n)
+    ]
+
+
+def groups(n):
+    return [
+        {
+            "id": str(i),
+            "name": f"TEAM-team{i}",
+            "path": f"/TEAM-team{i}",
+            "is_member": i % 2 == 0,
+            "attributes": {
+                "TEAM-email": [f"team{i}@example.org"],
+                "TEAM-slack-url": [f"https://example.slack.com/archives/team{i}"],
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def users(n):
+    return [
+        {
+            "id": str(i),
+            "username": f"user{i}",
+            "firstName": "User",
+            "lastName": str(i),
+            "email": f"user{i}@example.org",
+            "enabled": True,
+        }
+        for i in range(n)
+    ]
+
+
+CONVERSIONS = {
+    "OkdataPermission": (
+        uma_permissions,
+        OkdataPermission.from_uma_permission,
+        lambda p: OkdataPermission.from_uma_permission(p, validate=False),
+    ),
+    "Team": (groups, Team.parse_obj, Team.from_keycloak),
+    "TeamMember": (users, TeamMember.parse_obj, TeamMember.from_keycloak),
+}
+
+
+class StaticResourceServer:
+    """Lists the same permissions for every resource."""
+
+    def __init__(self, permissions):
+        self.permissions = permissions
+
+    def list_permissions(self, resource_name):
+        return self.permissions
+
+
+class AllowAll:
+    def has_access(self, *args):
+        return True
+
+
+def route_clients(uma_permissions):
+    """Return clients for the permission listing route, by variant.
+
+    Both serve `uma_permissions` without authorization or middleware, so
+    only the route and its rendering are measured.
+    """
+    overrides = {
+        permissions.resource_server: lambda: StaticResourceServer(uma_permissions),
+        AuthInfo: lambda: SimpleNamespace(principal_id="bench", bearer_token="t"),
+        resource_authorizer: AllowAll,
+    }
+
+    route_app = FastAPI()
+    route_app.include_router(permissions.router, prefix="/permissions")
+
+    # Like the route, but returning the models through `response_model`.
+    response_model_app = FastAPI()
+
+    @response_model_app.get(
+        "/permissions/{resource_name}",
+        response_model=list[OkdataPermission],
+        response_class=FastJSONResponse,
+    )
+    def get_permissions(resource_name: str):
+        return [
+            OkdataPermission.from_uma_permission(p, validate=False)
+            for p in uma_permissions
+        ]
+
+    clients = {}
+    for variant, app in [("route", route_app), ("response_model", response_model_app)]:
+        app.dependency_overrides.update(overrides)
+        clients[variant] = TestClient(app)
+    return clients
+
+
+def run(sizes, repeat):
+    """Run every conversion at every size and return the results."""
+    results = {}
+
+    for n in sizes:
+        for variant, client in route_clients(uma_permissions(n)).items():
+            url = "/permissions/okdata:dataset:dataset-0"
+            assert client.get(url).status_code == 200
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                client.get(url)
+                samples.append((time.perf_counter() - start) * 1000)
+
+            results[f"GET /permissions/{{resource_name}} {variant} n={n}"] = {
+                **summarize(samples),
+                "us_per_item": min(samples) * 1000 / n,
+            }
+
+    for model, (make_items, validated, trusted) in CONVERSIONS.items():
+        for n in sizes:
+            items = make_items(n)
+            for variant, convert in [("validated", validated), ("trusted", trusted)]:
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for item in items:
+                        convert(item)
+                    samples.append((time.perf_counter() - start) * 1000)
+
+                results[f"{model} {variant} n={n}"] = {
+                    **summarize(samples),
+                    "us_per_item": min(samples) * 1000 / n,
+                }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="comma separated numbers of items to convert",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="where to save the results as JSON")
+    parser.add_argument("--compare", help="earlier results to compare with")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.repeat)
+
+    print(format_table(results, ["us_per_item"]))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"models-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save(results, output, sizes=sizes, repeat=args.repeat)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print()
+        print(format_comparison(load(args.compare), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Summarizing, saving and comparing benchmark results.
+
+Results are dicts mapping a benchmark name to its summary (as returned by
+`summarize`), optionally with extra keys like upstream call counts.
+"""
+
+import json
+import math
+import platform
+import statistics
+import sys
+from datetime import datetime, timezone
+
+SUMMARY_KEYS = ["p50_ms", "p95_ms", "p99_ms", "mean_ms"]
+
+
+def percentile(samples, p):
+    """Return the `p`th percentile of `samples` (nearest rank)."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms):
+    return {
+        "n": len(samples_ms),
+        "mean_ms": statistics.fmean(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+    }
+
+
+def save(results, path, **meta):
+    """Write `results` to `path` as JSON, along with `meta` data."""
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    **meta,
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def format_table(results, extra_columns=()):
+    """Return `results` formatted as a plain text table."""
+    columns = SUMMARY_KEYS + list(extra_columns)
+    width = max([len("benchmark"), *map(len, results)])
+    lines = [
+        "  ".join(["benchmark".ljust(width), *(column.rjust(10) for column in columns)])
+    ]
+
+    for name, result in results.items():
+        cells = [
+            f"{result[column]:10.2f}" if column in result else " " * 10
+            for column in columns
+        ]
+        lines.append("  ".join([name.ljust(width), *cells]))
+
+    return "\n".join(lines)
+
+
+def format_comparison(base, new, key="p50_ms"):
+    """Return a table comparing `key` of every benchmark in `base` and `new`."""
+    width = max([len("benchmark"), *map(len, base.keys() | new.keys())])
+    lines = [
+        "  ".join(
+            [
+                "benchmark".ljust(width),
+                "base".rjust(10),
+                "new".rjust(10),
+                "change".rjust(8),
+            ]
+        )
+    ]
+
+    for name in sorted(base.keys() | new.keys()):
+        if name not in base or name not in new:
+            status = "removed" if name in base else "added"
+            lines.append(f"{name.ljust(width)}  {status.rjust(30)}")
+            continue
+
+        before, after = base[name][key], new[name][key]
+        change = (after - before) / before * 100 if before else 0
+        lines.append(
+            f"{name.ljust(width)}  {before:10.2f}  {after:10.2f}  {change:+7.1f}%"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,153 @@
+"""CPU benchmarks for JSON encoding and decoding.
+
+Each response payload is rendered with Starlette's `JSONResponse` (standard
+library json) and with `FastJSONResponse` (orjson, when installed). Full
+realm scans, i.e. every page of permissions from Keycloak and the
+permissions backup, are decoded with `requests.Response.json` and with
+`fast_json.loads`.
+
+Usage: python -m benchmarks.serialization [--sizes 1000,10000,100000]
+                                          [--repeat N] [--output FILE]
+                                          [--compare BASE.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import time
+from datetime import datetime
+
+import requests
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.models import groups, uma_permissions, users
+from benchmarks.report import format_comparison, format_table, load, save, summarize
+from dataplatform_keycloak import fast_json
+from dataplatform_keycloak.resource_server import ResourceServer
+from models import OkdataPermission, Team, TeamMember
+from resources.responses import FastJSONResponse
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def payloads(n):
+    """Return a dict of payload name to content, as routes would render it."""
+    return {
+        "GET /permissions/{resource_name}": jsonable_encoder(
+            [OkdataPermission.from_uma_permission(p) for p in uma_permissions(n)]
+        ),
+        "GET /teams?include=all": jsonable_encoder(
+            [Team.parse_obj(group) for group in groups(n)], exclude_unset=True
+        ),
+        "GET /teams/{team_id}/members": jsonable_encoder(
+            [TeamMember.parse_obj(user) for user in users(n)]
+        ),
+        "permissions backup": uma_permissions(n),
+    }
+
+
+def keycloak_pages(permissions):
+    """Return `permissions` as the responses of a paginated Keycloak scan."""
+    page_size = ResourceServer.MAX_ITEMS_PER_PAGE
+    pages = []
+    for first in range(0, len(permissions) + 1, page_size):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(permissions[first : first + page_size]).encode()
+        pages.append(response)
+    return pages
+
+
+def timed_samples(f, repeat):
+    """Return the time in milliseconds of `repeat` calls to `f`.
+
+    The garbage collector is paused while timing, so that collections
+    triggered by earlier results don't add noise.
+    """
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            f()
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            gc.enable()
+    return samples
+
+
+def run(sizes, repeat):
+    """Encode and decode every payload at every size and return the results."""
+    results = {}
+    encoder = "orjson" if fast_json.orjson else "stdlib fallback"
+
+    for n in sizes:
+        for name, content in payloads(n).items():
+            for variant, response_class in [
+                ("JSONResponse", JSONResponse),
+                (f"FastJSONResponse ({encoder})", FastJSONResponse),
+            ]:
+                samples = timed_samples(lambda: response_class(content), repeat)
+                results[f"{name} {variant} n={n}"] = {
+                    **summarize(samples),
+                    "size_kb": len(response_class(content).body) / 1024,
+                }
+
+        permissions = uma_permissions(n)
+        pages = keycloak_pages(permissions)
+        backup = json.dumps(permissions).encode()
+        decoder = "orjson" if fast_json.orjson else "stdlib fallback"
+
+        for name, variant, decode in [
+            ("Keycloak scan", "Response.json", lambda: [p.json() for p in pages]),
+            (
+                "Keycloak scan",
+                f"fast_json ({decoder})",
+                lambda: [fast_json.loads(p.content) for p in pages],
+            ),
+            ("backup load", "json.loads", lambda: json.loads(backup)),
+            ("backup load", f"fast_json ({decoder})", lambda: fast_json.loads(backup)),
+        ]:
+            results[f"{name} {variant} n={n}"] = {
+                **summarize(timed_samples(decode, repeat)),
+                "size_kb": len(backup) / 1024,
+            }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="comma separated numbers of items per payload",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="where to save the results as JSON")
+    parser.add_argument("--compare", help="earlier results to compare with")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.repeat)
+
+    print(format_table(results, ["size_kb"]))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"serialization-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save(results, output, sizes=sizes, repeat=args.repeat)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print()
+        print(format_comparison(load(args.compare), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""In-memory caching of Keycloak data."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A thread-safe mapping whose entries expire after `ttl` seconds.
+
+    When `maxsize` is given, the least recently used entries are evicted to
+    make room for new ones.
+    """
+
+    def __init__(self, ttl, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value cached for `key`, or `default` if there is none."""
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                return default
+
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Cache `value` for `key`, optionally with a custom `ttl`."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove `key` from the cache and return its value (expired or not)."""
+        with self._lock:
+            value, _ = self._entries.pop(key, (default, None))
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_MISSING = object()
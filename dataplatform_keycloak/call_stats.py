@@ -0,0 +1,105 @@
+"""Accounting of the upstream calls made while handling a request."""
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+_current_stats = contextvars.ContextVar("call_stats", default=None)
+
+# Categories of Keycloak endpoints, by path fragment. The first match wins.
+_URL_CATEGORIES = [
+    ("/.well-known/", "discovery"),
+    ("/protocol/openid-connect/certs", "jwks"),
+    ("/protocol/openid-connect/", "token"),
+    ("/authz/protection/uma-policy", "policy"),
+    ("/authz/protection/resource_set", "resource_set"),
+    ("/admin/realms/", "admin"),
+]
+
+_instrumented = False
+
+
+class CallStats:
+    """Number of calls and total time spent in them, per category."""
+
+    def __init__(self):
+        self.calls = {}
+        self.duration_ms = {}
+        self._lock = threading.Lock()
+
+    def record(self, category, duration_ms):
+        with self._lock:
+            self.calls[category] = self.calls.get(category, 0) + 1
+            self.duration_ms[category] = self.duration_ms.get(category, 0) + duration_ms
+
+    def server_timing(self):
+        """Return the stats formatted as a `Server-Timing` header value."""
+        with self._lock:
+            return ", ".join(
+                f'{category};desc="{self.calls[category]} calls";dur={duration:.1f}'
+                for category, duration in sorted(self.duration_ms.items())
+            )
+
+
+@contextmanager
+def call_stats_scope():
+    """Record upstream calls until the end of the block.
+
+    Yield the `CallStats` in use. Work submitted to the thread pools in
+    `dataplatform_keycloak.concurrency` records to the same stats.
+    """
+    stats = CallStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def timed(category):
+    """Record the block as one call of `category`, if inside a scope."""
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+
+    start_time = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        stats.record(category, (time.perf_counter_ns() - start_time) / 1000000.0)
+
+
+def url_category(url):
+    path = urlsplit(url).path
+    for fragment, category in _URL_CATEGORIES:
+        if fragment in path:
+            return category
+    return "other"
+
+
+def instrument_requests():
+    """Record every HTTP request sent through `requests`.
+
+    This covers our own clients as well as python-keycloak and
+    okdata-resource-auth, which all use `requests` sessions.
+    """
+    global _instrumented
+    if _instrumented:
+        return
+
+    send = requests.Session.send
+
+    @functools.wraps(send)
+    def timed_send(session, request, **kwargs):
+        with timed(url_category(request.url)):
+            return send(session, request, **kwargs)
+
+    requests.Session.send = timed_send
+    _instrumented = True
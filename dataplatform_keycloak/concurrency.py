@@ -0,0 +1,62 @@
+"""Utilities for running independent Keycloak calls concurrently."""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("KEYCLOAK_MAX_CONCURRENCY", 8))
+
+# One pool per level of nesting. Work running in a pool only ever waits on
+# work in the pools after it, so a busy pool can't deadlock itself. Calls
+# nested deeper than this are run sequentially.
+_executors = [
+    ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix=f"keycloak-{i}")
+    for i in range(2)
+]
+_worker_state = threading.local()
+
+
+def _run_in_worker(depth, context, function, *args):
+    _worker_state.depth = depth
+    return context.run(function, *args)
+
+
+def run_concurrently(*functions):
+    """Call every function in `functions` concurrently.
+
+    Return a list of their return values, in the same order as `functions`.
+    If any of the calls raise an exception, the first one (by order in
+    `functions`) is re-raised after every call has finished.
+
+    Each call runs in a copy of the caller's context, so context variables
+    set for the current request are visible to it.
+    """
+    return map_concurrently(lambda function: function(), functions)
+
+
+def map_concurrently(function, items):
+    """Return `[function(item) for item in items]`, computed concurrently.
+
+    At most `MAX_WORKERS` calls are in flight at once per level of nesting.
+    Exceptions are handled the same way as in `run_concurrently`.
+    """
+    items = list(items)
+    depth = getattr(_worker_state, "depth", 0)
+
+    if len(items) < 2 or depth >= len(_executors):
+        return [function(item) for item in items]
+
+    futures = [
+        _executors[depth].submit(
+            _run_in_worker, depth + 1, contextvars.copy_context(), function, item
+        )
+        for item in items
+    ]
+    exceptions = [future.exception() for future in futures]
+
+    for exception in exceptions:
+        if exception is not None:
+            raise exception
+
+    return [future.result() for future in futures]
@@ -0,0 +1,151 @@
+"""Caching of Keycloak's discovery documents.
+
+Documents like `.well-known/uma2-configuration` and the realm's JWKS rarely
+change, but used to be fetched by every new `ResourceServer` and on every
+token decode. They're now kept in memory, and in files under
+`DISCOVERY_CACHE_DIR` for other processes in the same sandbox (re-initialized
+Lambda handlers, scripts) to pick up.
+
+Cached documents are parsed again every time they're loaded from a file, so
+whatever validation the parser does applies to them as to fresh ones.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+import requests
+
+from dataplatform_keycloak import fast_json
+from dataplatform_keycloak.cache import TTLCache
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
+
+# Set to an empty string to only cache documents in memory.
+DISCOVERY_CACHE_DIR = os.environ.get(
+    "DISCOVERY_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "okdata-permission-api"),
+)
+
+# Number of seconds to keep a document before fetching it again.
+DISCOVERY_TTL = int(os.environ.get("DISCOVERY_TTL", 3600))
+
+_documents = TTLCache(ttl=DISCOVERY_TTL, maxsize=100)
+
+
+def _cache_path(url):
+    """Return the path of the file caching `url`, or `None` if unusable."""
+    if not DISCOVERY_CACHE_DIR:
+        return None
+
+    try:
+        os.makedirs(DISCOVERY_CACHE_DIR, mode=0o700, exist_ok=True)
+        stat = os.stat(DISCOVERY_CACHE_DIR)
+    except OSError as e:
+        logger.warning(f"Discovery cache directory is unusable: {e}")
+        return None
+
+    # Anyone able to write to the directory could plant signing keys.
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        logger.warning(
+            f"Not caching discovery documents in {DISCOVERY_CACHE_DIR}, since "
+            "others may write to it"
+        )
+        return None
+
+    name = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(DISCOVERY_CACHE_DIR, f"{name}.json")
+
+
+def _read(url, ttl):
+    """Return the document cached in a file for `url` and its age in seconds.
+
+    Return `(None, None)` if there is no fresh copy.
+    """
+    path = _cache_path(url)
+    if path is None:
+        return None, None
+
+    try:
+        with open(path, "rb") as f:
+            cached = fast_json.loads(f.read())
+        age = time.time() - cached["stored_at"]
+        if cached["url"] != url or not 0 <= age < ttl:
+            return None, None
+        return cached["document"], age
+    except FileNotFoundError:
+        return None, None
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable discovery cache for {url}: {e}")
+        return None, None
+
+
+def _write(url, document):
+    path = _cache_path(url)
+    if path is None:
+        return
+
+    cached = {"url": url, "stored_at": time.time(), "document": document}
+    try:
+        # Write to a temporary file first, so that readers never see a partial
+        # document.
+        fd, tmp_path = tempfile.mkstemp(dir=DISCOVERY_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(fast_json.dumps(cached))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not cache discovery document for {url}: {e}")
+
+
+def _remove(url):
+    path = _cache_path(url)
+    if path is not None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _fetch(url):
+    response = requests.get(url, timeout=15)
+    response.raise_for_status()
+    return fast_json.loads(response.content)
+
+
+def get_document(url, parse, ttl=DISCOVERY_TTL, refresh=False):
+    """Return `parse(document)` for the JSON document at `url`.
+
+    The parsed document is cached in memory, and the raw document in a file,
+    for `ttl` seconds. Cached documents that `parse` rejects by raising an
+    exception are discarded and fetched again. Pass `refresh=True` to fetch
+    the document regardless of what's cached.
+    """
+    if not refresh:
+        parsed = _documents.get(url)
+        if parsed is not None:
+            return parsed
+
+        document, age = _read(url, ttl)
+        if document is not None:
+            try:
+                parsed = parse(document)
+            except Exception as e:
+                logger.warning(f"Discarding invalid cached document for {url}: {e}")
+                _remove(url)
+            else:
+                _documents.set(url, parsed, ttl=ttl - age)
+                return parsed
+
+    document = _fetch(url)
+    parsed = parse(document)
+    _write(url, document)
+    _documents.set(url, parsed, ttl=ttl)
+    return parsed
+
+
+def clear():
+    """Forget every document cached in memory."""
+    _documents.clear()
@@ -0,0 +1,37 @@
+"""JSON encoding and decoding backed by orjson when it's installed.
+
+Falls back to the standard library, producing the same compact output as
+Starlette's `JSONResponse`.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """Return `obj` encoded as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def loads(data):
+    """Return the object decoded from the JSON `data` (bytes or str).
+
+    Raise `ValueError` if `data` isn't valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
@@ -1,26 +1,44 @@
 """Utilities for handling JSON Web Tokens (JWTs)."""
 
+import functools
+import threading
 from datetime import datetime, timedelta
 
 import jwt
 
 from dataplatform_keycloak.ssm import SsmClient
 
+JWT_LIFETIME = timedelta(seconds=120)
 
-def generate_jwt():
-    """Return a freshly generated JWT.
+# Replace the cached JWT when it has less than this left before expiring, so
+# that it doesn't expire while a request using it is in flight.
+JWT_RENEWAL_MARGIN = timedelta(seconds=20)
 
-    The expiration time is currently hard-coded to 120 seconds. Both issue time
-    (iat) and expiration time (exp) are given as POSIX timestamps.
+
+@functools.cache
+def _signing_material():
+    """Return the issuer and signing key for JWTs, as stored in SSM.
+
+    The values are cached for the lifetime of the container.
     """
-    now = datetime.now()
-    expiration_time = now + timedelta(seconds=120)
     issuer = SsmClient.get_secret(
         "/dataplatform/teams-api/kong-keycloak-jwt-issuer",
     )
     key = SsmClient.get_secret(
         "/dataplatform/teams-api/kong-keycloak-jwt-secret",
     )
+    return issuer, key
+
+
+def generate_jwt():
+    """Return a freshly generated JWT.
+
+    The expiration time is currently hard-coded to 120 seconds. Both issue time
+    (iat) and expiration time (exp) are given as POSIX timestamps.
+    """
+    now = datetime.now()
+    expiration_time = now + JWT_LIFETIME
+    issuer, key = _signing_material()
     claims = {
         "iat": int(now.timestamp()),
         "exp": int(expiration_time.timestamp()),
@@ -28,3 +46,24 @@ def generate_jwt():
     }
 
     return jwt.encode(claims, key, algorithm="HS256")
+
+
+_cached_jwt_lock = threading.Lock()
+_cached_jwt = None
+_cached_jwt_renew_at = None
+
+
+def cached_jwt():
+    """Return a JWT, reusing the previous one until it's about to expire.
+
+    A new JWT is generated by `generate_jwt` when less than
+    `JWT_RENEWAL_MARGIN` remains of the previous one's lifetime.
+    """
+    global _cached_jwt, _cached_jwt_renew_at
+
+    with _cached_jwt_lock:
+        now = datetime.now()
+        if _cached_jwt is None or now >= _cached_jwt_renew_at:
+            _cached_jwt = generate_jwt()
+            _cached_jwt_renew_at = now + JWT_LIFETIME - JWT_RENEWAL_MARGIN
+        return _cached_jwt
@@ -0,0 +1,76 @@
+"""Memoization of Keycloak reads for the duration of a single request.
+
+Routes often end up reading the same object from Keycloak more than once,
+e.g. when authorizing a change and then applying it. Inside `request_scope`,
+reads wrapped in `memoized` are only sent to Keycloak the first time.
+"""
+
+import contextvars
+import copy
+import threading
+from contextlib import contextmanager
+
+_current_cache = contextvars.ContextVar("request_cache", default=None)
+
+
+class RequestCache:
+    """Keycloak reads made so far in the current request.
+
+    `hits` counts the reads that were served from the cache instead of
+    Keycloak.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+
+@contextmanager
+def request_scope():
+    """Memoize Keycloak reads until the end of the block.
+
+    Yield the `RequestCache` in use. Work submitted to the thread pools in
+    `dataplatform_keycloak.concurrency` shares the cache with its caller.
+    """
+    cache = RequestCache()
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
+
+
+def memoized(key, fetch):
+    """Return the result of calling `fetch`, memoized under `key`.
+
+    `key` is a tuple starting with the kind of object being read. Outside of
+    a request scope, `fetch` is always called. Results are copied, so callers
+    are free to modify them.
+    """
+    cache = _current_cache.get()
+    if cache is None:
+        return fetch()
+
+    with cache._lock:
+        if key in cache._entries:
+            cache.hits += 1
+            return copy.deepcopy(cache._entries[key])
+
+    value = fetch()
+
+    with cache._lock:
+        cache._entries[key] = copy.deepcopy(value)
+
+    return value
+
+
+def invalidate(*key_prefix):
+    """Forget every memoized read whose key starts with `key_prefix`."""
+    cache = _current_cache.get()
+    if cache is None:
+        return
+
+    with cache._lock:
+        for key in [k for k in cache._entries if k[: len(key_prefix)] == key_prefix]:
+            del cache._entries[key]
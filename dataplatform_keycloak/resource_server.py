@@ -1,13 +1,16 @@
+import functools
 import os
 from typing import List, Optional
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 
 import jwt
 import requests
 from keycloak import KeycloakOpenID
 from requests.models import PreparedRequest
 
+from dataplatform_keycloak import fast_json
 from dataplatform_keycloak.exceptions import (
     CannotRemoveOnlyAdminException,
     ConfigurationError,
@@ -15,8 +18,9 @@ from dataplatform_keycloak.exceptions import (
     ResourceNotFoundError,
 )
 from dataplatform_keycloak.groups import team_name_to_group_name
+from dataplatform_keycloak.request_cache import invalidate, memoized
 from dataplatform_keycloak.ssm import SsmClient
-from dataplatform_keycloak.uma_well_known import get_well_known
+from dataplatform_keycloak.uma_well_known import get_jwks, get_well_known
 from models import User, UserType
 from models.scope import all_scopes_for_type, resource_type, scope_permission
 from resources.resource_util import resource_type_from_resource_name
@@ -28,6 +32,10 @@ logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 class ResourceServer:
     MAX_ITEMS_PER_PAGE = 300
 
+    # Renew the access token when it has less than this many seconds left, so
+    # that it doesn't expire before it's used in a request.
+    TOKEN_RENEWAL_MARGIN = 10
+
     def __init__(
         self,
         client_secret_key=os.environ.get("RESOURCE_SERVER_CLIENT_SECRET"),
@@ -61,6 +69,8 @@ class ResourceServer:
         self.uma_well_known = get_well_known(keycloak_server_url, keycloak_realm)
 
         self.resource_server_token = None
+        self.resource_server_token_expires_at = None
+        self._token_lock = threading.Lock()
 
     def create_resource(self, resource_name: str, owner: Optional[User] = None):
         scopes = all_scopes_for_type(resource_type_from_resource_name(resource_name))
@@ -132,6 +142,7 @@ class ResourceServer:
             json=permission,
             timeout=15,
         )
+        invalidate("permission", permission_name)
         return resp.json()
 
     def _update_permission(
@@ -194,6 +205,7 @@ class ResourceServer:
                 timeout=15,
             )
             resp.raise_for_status()
+            invalidate("permission", permission_name)
 
             if any([users, groups, clients]):
                 # Return the "real" updated permission from Keycloak.
@@ -244,10 +256,17 @@ class ResourceServer:
         res = requests.put(
             url, headers=self.request_headers(), json=permission, timeout=15
         )
+        invalidate("permission", permission["name"])
         res.raise_for_status()
         return res
 
     def get_permission(self, permission_name):
+        return memoized(
+            ("permission", permission_name),
+            lambda: self._fetch_permission(permission_name),
+        )
+
+    def _fetch_permission(self, permission_name):
         get_permission_url = (
             f"{self.uma_well_known.policy_endpoint}/?name={permission_name}"
         )
@@ -269,7 +288,7 @@ class ResourceServer:
         logger.info(f"GET {request.url}")
         resp = requests.Session().send(request)
         resp.raise_for_status()
-        return resp.json()
+        return fast_json.loads(resp.content)
 
     def _get_permissions(self, params={}):
         """Yield every permission from Keycloak matching `params`.
@@ -335,6 +354,7 @@ class ResourceServer:
         delete_url = f"{self.uma_well_known.policy_endpoint}/{permission_id}"
         logger.info(f"DELETE {delete_url}")
         resp = requests.delete(delete_url, headers=self.request_headers(), timeout=15)
+        invalidate("permission", permission_name)
         return resp.status_code, resp.text
 
     def delete_resource(self, resource_name):
@@ -342,10 +362,17 @@ class ResourceServer:
         url = f"{self.uma_well_known.resource_registration_endpoint}/{resource_id}"
         logger.info(f"DELETE {url}")
         resp = requests.delete(url, headers=self.request_headers(), timeout=15)
+        invalidate("resource_id", resource_name)
         resp.raise_for_status()
         return resp
 
     def get_resource_id(self, resource_name):
+        return memoized(
+            ("resource_id", resource_name),
+            lambda: self._fetch_resource_id(resource_name),
+        )
+
+    def _fetch_resource_id(self, resource_name):
         get_id_url = (
             f"{self.uma_well_known.resource_registration_endpoint}?name={resource_name}"
         )
@@ -403,35 +430,66 @@ class ResourceServer:
             "Content-Type": "application/json",
         }
 
-    def resource_server_access_token(self):
-        if self.resource_server_token is None:
-            self.resource_server_token = self.resource_server_client.token(
-                grant_type=["client_credentials"]
-            )["access_token"]
-        else:
-            if self._token_is_expired(self.resource_server_token):
-                self.resource_server_token = self.resource_server_client.token(
+    def resource_server_access_token(self, min_validity=TOKEN_RENEWAL_MARGIN):
+        """Return an access token valid for at least `min_validity` seconds.
+
+        The token is kept across requests, and renewed when it's about to
+        expire.
+        """
+        with self._token_lock:
+            if self._token_is_expired(min_validity):
+                requested_at = datetime.utcnow()
+                token = self.resource_server_client.token(
                     grant_type=["client_credentials"]
-                )["access_token"]
-        return self.resource_server_token
+                )
+                self.resource_server_token = token["access_token"]
+                self.resource_server_token_expires_at = requested_at + timedelta(
+                    seconds=token["expires_in"]
+                )
+            return self.resource_server_token
 
     def _decode_jwt(self, token, audience):
         """Return `token` decoded by Keycloak's public signing key."""
-        jwks_client = jwt.PyJWKClient(self.uma_well_known.jwks_uri)
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        key_id = jwt.get_unverified_header(token).get("kid")
+        try:
+            signing_key = get_jwks(self.uma_well_known.jwks_uri)[key_id]
+        except KeyError:
+            # The keys may have been rotated since they were cached.
+            signing_key = get_jwks(self.uma_well_known.jwks_uri, refresh=True)[key_id]
 
         return jwt.decode(
             token, signing_key.key, algorithms=["RS256"], audience=audience
         )
 
-    def _token_is_expired(self, token):
-        """Return true if `token` is expired or about to expire."""
-        decoded_token = self._decode_jwt(token, "account")
-        expires_at = datetime.utcfromtimestamp(decoded_token["exp"])
-        expires_in = expires_at - datetime.utcnow()
+    def _token_is_expired(self, min_validity):
+        """Return true if the access token expires within `min_validity` seconds.
+
+        Going by the lifetime Keycloak gave along with the token, it doesn't
+        have to be decoded (which would fail for an expired token).
+        """
+        if self.resource_server_token is None:
+            return True
+
+        expires_in = self.resource_server_token_expires_at - datetime.utcnow()
+        return expires_in.total_seconds() < min_validity
+
+    def warm_up(self, min_validity=TOKEN_RENEWAL_MARGIN):
+        """Make sure that an access token and Keycloak's signing keys are ready.
+
+        The token is renewed if it expires within `min_validity` seconds.
+        """
+        self.resource_server_access_token(min_validity=min_validity)
+        get_jwks(self.uma_well_known.jwks_uri)
+
+
+@functools.cache
+def get_resource_server():
+    """Return a `ResourceServer` shared by every request in this container.
 
-        # Ensure that the token will not expire before it is used in a request
-        return expires_in.total_seconds() < 10
+    The server keeps its discovered endpoints and access token across
+    requests, saving a well-known lookup and a token request per request.
+    """
+    return ResourceServer()
 
 
 def permission_description(scope, resource_name):
@@ -1,11 +1,16 @@
 import os
 
-import boto3
+from dataplatform_keycloak.call_stats import timed
 
 
 class SsmClient:
     @staticmethod
     def get_secret(key):
-        client = boto3.client("ssm", region_name=os.environ["AWS_REGION"])
-        resp = client.get_parameter(Name=key, WithDecryption=True)
+        # Imported here, as boto3 takes a while to import and secrets are
+        # only needed once the first Keycloak client is set up.
+        import boto3
+
+        with timed("ssm"):
+            client = boto3.client("ssm", region_name=os.environ["AWS_REGION"])
+            resp = client.get_parameter(Name=key, WithDecryption=True)
         return resp["Parameter"]["Value"]
@@ -1,15 +1,24 @@
+import functools
 import logging
 import os
+import threading
+import time
+from datetime import datetime, timedelta
 
-from keycloak import KeycloakAdmin
+import jwt
+from keycloak import KeycloakAdmin, KeycloakOpenIDConnection
 from keycloak.exceptions import (
     KeycloakError,
     KeycloakGetError,
+    KeycloakPostError,
     KeycloakPutError,
     raise_error_from_response,
 )
 from keycloak.urls_patterns import URL_ADMIN_REALM_ROLES
 
+from dataplatform_keycloak import fast_json
+from dataplatform_keycloak.cache import TTLCache
+from dataplatform_keycloak.concurrency import MAX_WORKERS, map_concurrently
 from dataplatform_keycloak.exceptions import (
     ConfigurationError,
     TeamNameExistsError,
@@ -22,33 +31,134 @@ from dataplatform_keycloak.groups import (
     team_attribute_to_group_attribute,
     team_name_to_group_name,
 )
-from dataplatform_keycloak.jwt import generate_jwt
+from dataplatform_keycloak.jwt import cached_jwt
+from dataplatform_keycloak.request_cache import invalidate, memoized
 from dataplatform_keycloak.ssm import SsmClient
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 
 
-class TeamsKeycloakAdmin(KeycloakAdmin):
-    def __init__(self, server_url, admin_api_server_url=None, **kwargs):
-        super().__init__(server_url=server_url, **kwargs)
+class TeamsKeycloakConnection(KeycloakOpenIDConnection):
+    """Connection to the Keycloak Admin API that can be kept across requests.
+
+    Access tokens are renewed using the refresh token, or by logging in again
+    when the refresh token has expired too.
+    """
+
+    def __init__(self, admin_api_server_url=None, **kwargs):
+        self._refresh_lock = threading.Lock()
+        super().__init__(**kwargs)
+        self.admin_api_server_url = admin_api_server_url
 
         # Override the connection to allow usage of another base URL for
         # requests towards the Admin API, in this case a configured Kong route
         # that acts as a proxy:
         # https://github.com/oslokommune/dataplattform/blob/master/dataplattform-internt/arkitektur/utviklerportalen.md#teknisk
         if admin_api_server_url:
-            self.connection.base_url = admin_api_server_url
-            self.connection.headers = {
-                "Authorization": f"Bearer {generate_jwt()}",
-                "Keycloak-Authorization": f"Bearer {self.connection.token.get('access_token')}",
+            self.base_url = admin_api_server_url
+            self.headers = {
+                "Authorization": f"Bearer {cached_jwt()}",
+                "Keycloak-Authorization": f"Bearer {self.token.get('access_token')}",
                 "Content-Type": "application/json",
             }
 
+    def refresh_token(self):
+        if self._refresh_token_is_expired():
+            self.get_token()
+        else:
+            try:
+                self.token = self.keycloak_openid.refresh_token(
+                    self.token["refresh_token"]
+                )
+            except KeycloakPostError as e:
+                # The session may have ended on Keycloak's side; log in again.
+                if e.response_code != 400:
+                    raise
+                self.get_token()
+
+        if self.admin_api_server_url:
+            self.add_param_headers(
+                "Keycloak-Authorization", f"Bearer {self.token['access_token']}"
+            )
+        else:
+            self.add_param_headers(
+                "Authorization", f"Bearer {self.token['access_token']}"
+            )
+
+    def refresh_if_expiring(self, min_validity):
+        """Refresh the access token if it expires within `min_validity` seconds."""
+        with self._refresh_lock:
+            if datetime.now() + timedelta(seconds=min_validity) >= self.expires_at:
+                self.refresh_token()
+
+    def _refresh_if_required(self):
+        with self._refresh_lock:
+            super()._refresh_if_required()
+
+        # The JWT for Kong is short-lived; make sure that long-lived clients
+        # always pass a valid one along.
+        if self.admin_api_server_url:
+            self.add_param_headers("Authorization", f"Bearer {cached_jwt()}")
+
+    def _refresh_token_is_expired(self):
+        """Return true if the refresh token is missing or about to expire."""
+        refresh_token = self.token and self.token.get("refresh_token")
+        if not refresh_token:
+            return True
+        try:
+            expires_at = jwt.decode(
+                refresh_token, options={"verify_signature": False}
+            ).get("exp")
+        except jwt.InvalidTokenError:
+            # Leave it to Keycloak to tell whether the token is still good.
+            return False
+        return expires_at is not None and expires_at - time.time() < 10
+
+
+class TeamsKeycloakAdmin(KeycloakAdmin):
+    def __init__(self, server_url, admin_api_server_url=None, **kwargs):
+        super().__init__(
+            connection=TeamsKeycloakConnection(
+                server_url=server_url,
+                admin_api_server_url=admin_api_server_url,
+                **kwargs,
+            )
+        )
+
+
+# Cache marker for usernames that don't exist in Keycloak.
+_UNKNOWN_USER = object()
+
+
+class TeamCatalogue:
+    """Every team in the realm, indexed by ID and by group name."""
+
+    def __init__(self, groups):
+        self.teams = [group for group in groups if is_team_group(group["name"])]
+        self.by_id = {team["id"]: team for team in self.teams}
+        self.by_name = {team["name"]: team for team in self.teams}
+
 
 class TeamsClient:
     MAX_ITEMS_PER_PAGE = 300
 
+    # Number of seconds to keep the list of teams before fetching it again.
+    TEAM_CATALOGUE_TTL = 60
+
+    # Number of seconds to keep user representations, and how many to keep.
+    # Unknown usernames are remembered for a shorter time, in case they're
+    # about to be created.
+    USER_CACHE_TTL = 300
+    USER_CACHE_MAXSIZE = 10000
+    UNKNOWN_USER_CACHE_TTL = 60
+
+    # Number of seconds to remember which teams a user is a member of.
+    USER_TEAMS_CACHE_TTL = 30
+
+    # Number of seconds to keep the groups assigned each realm role.
+    REALM_ROLE_CACHE_TTL = 60
+
     def __init__(
         self,
         keycloak_server_url=os.environ.get("KEYCLOAK_SERVER"),
@@ -78,36 +188,79 @@ class TeamsClient:
             verify=True,
         )
 
+        self._team_catalogue = TTLCache(ttl=self.TEAM_CATALOGUE_TTL, maxsize=1)
+        self._team_catalogue_lock = threading.Lock()
+        self._users = TTLCache(ttl=self.USER_CACHE_TTL, maxsize=self.USER_CACHE_MAXSIZE)
+        self._user_teams = TTLCache(
+            ttl=self.USER_TEAMS_CACHE_TTL, maxsize=self.USER_CACHE_MAXSIZE
+        )
+        self._realm_role_groups = TTLCache(ttl=self.REALM_ROLE_CACHE_TTL, maxsize=100)
+
+    def warm_up(self, min_validity=0):
+        """Make sure that the Admin API session and the team catalogue are ready.
+
+        The access token is refreshed if it expires within `min_validity`
+        seconds.
+        """
+        self.teams_admin_client.connection.refresh_if_expiring(min_validity)
+        self.list_teams()
+
     def list_teams(self, realm_role=None):
         try:
-            groups = (
-                self._get_groups_with_realm_role(role_name=realm_role)
-                if realm_role
-                else self.teams_admin_client.get_groups()
-            )
+            if not realm_role:
+                # Hand out copies, since callers are free to modify them.
+                return [dict(team) for team in self._get_team_catalogue().teams]
+
+            groups = self._get_groups_with_realm_role(role_name=realm_role)
         except KeycloakError as e:
             log_keycloak_error(e)
             raise TeamsServerError
 
         return [group for group in groups if is_team_group(group["name"])]
 
-    def list_user_teams(self, username):
-        try:
-            user_id = self.teams_admin_client.get_user_id(username)
-            user_groups = self.teams_admin_client.get_user_groups(user_id)
-        except KeycloakGetError as e:
-            if e.response_code == 404:
-                return []
-            log_keycloak_error(e)
-            raise TeamsServerError
-        except KeycloakError as e:
-            log_keycloak_error(e)
-            raise TeamsServerError
-        return [group for group in user_groups if is_team_group(group["name"])]
+    def list_user_teams(self, username, cached=True):
+        """Return the teams in which `username` is a member.
+
+        The result is cached for `USER_TEAMS_CACHE_TTL` seconds. Pass
+        `cached=False` to bypass the cache, e.g. for authorization decisions.
+        """
+        username = username.lower()
+        user_teams = self._user_teams.get(username) if cached else None
+
+        if user_teams is None:
+            try:
+                user_id = self.get_user_id(username)
+                user_groups = (
+                    self.teams_admin_client.get_user_groups(user_id) if user_id else []
+                )
+            except KeycloakGetError as e:
+                if e.response_code != 404:
+                    log_keycloak_error(e)
+                    raise TeamsServerError
+                # The user may have been deleted since we cached its ID.
+                self._users.pop(username)
+                user_groups = []
+            except KeycloakError as e:
+                log_keycloak_error(e)
+                raise TeamsServerError
+
+            user_teams = [
+                group for group in user_groups if is_team_group(group["name"])
+            ]
+            self._user_teams.set(username, user_teams)
+
+        # Hand out copies, since callers are free to modify them.
+        return [dict(team) for team in user_teams]
+
+    def user_team_ids(self, username, cached=True):
+        """Return the set of IDs of the teams in which `username` is a member."""
+        return frozenset(
+            team["id"] for team in self.list_user_teams(username, cached=cached)
+        )
 
     def get_team(self, team_id, realm_role=None):
         try:
-            group = self.teams_admin_client.get_group(group_id=team_id)
+            group = self._get_group(team_id)
         except KeycloakGetError:
             raise TeamNotFoundError
         except KeycloakError as e:
@@ -119,23 +272,65 @@ class TeamsClient:
             raise TeamNotFoundError
         return group
 
+    def get_teams(self, team_ids, realm_role=None):
+        """Return the teams with IDs in `team_ids`, fetched concurrently.
+
+        Return a tuple of the teams that were found, and the IDs of those
+        that weren't.
+        """
+
+        def get_team_or_none(team_id):
+            try:
+                return self.get_team(team_id, realm_role=realm_role)
+            except TeamNotFoundError:
+                return None
+
+        team_ids = list(dict.fromkeys(team_ids))
+        teams = map_concurrently(get_team_or_none, team_ids)
+
+        return (
+            [team for team in teams if team],
+            [team_id for team_id, team in zip(team_ids, teams) if not team],
+        )
+
     def get_team_by_name(self, team_name, realm_role=None):
         group_name = team_name_to_group_name(team_name)
 
+        catalogue = self._team_catalogue.get("teams")
+        cached_team = catalogue and catalogue.by_name.get(group_name)
+        if cached_team:
+            team = self.get_team(cached_team["id"], realm_role)
+            if team["name"] == group_name:
+                return team
+            # Renamed since the catalogue was fetched, possibly by another
+            # container.
+            self._team_catalogue.pop("teams")
+
         try:
-            group = next(
-                group
-                for group in self.list_teams(realm_role)
-                if group["name"] == group_name
-            )
-            return self.get_team(group["id"], realm_role)
-        except StopIteration:
+            team = self._find_group_by_name(group_name)
+        except KeycloakError as e:
+            log_keycloak_error(e)
+            raise TeamsServerError
+
+        if not team:
             raise TeamNotFoundError
 
-    def get_team_members(self, team_id, realm_role=None):
+        return self.get_team(team["id"], realm_role)
+
+    def get_team_members(self, team_id, realm_role=None, first=None, max_results=None):
+        """Return the members of the team with ID `team_id`.
+
+        When `max_results` is given, only that many members starting from
+        index `first` are fetched.
+        """
         team = self.get_team(team_id, realm_role=realm_role)
+        query = (
+            {"first": first or 0, "max": max_results}
+            if max_results is not None
+            else None
+        )
         try:
-            members = self.teams_admin_client.get_group_members(group_id=team["id"])
+            members = self._get_group_members(team["id"], query)
         except KeycloakError as e:
             log_keycloak_error(e)
             raise TeamsServerError
@@ -167,55 +362,197 @@ class TeamsClient:
         except KeycloakError as e:
             log_keycloak_error(e)
             raise TeamsServerError
+        finally:
+            invalidate("group", team["id"])
+
+        self._team_catalogue.clear()
+        self._user_teams.clear()
+        self._realm_role_groups.clear()
 
         return team
 
     def update_members(self, team_id, usernames):
-        target_member_ids = set()
+        """Replace the members of the team with ID `team_id` by `usernames`.
 
-        for username in set(usernames):
-            try:
-                if user_id := self.teams_admin_client.get_user_id(username):
-                    target_member_ids.add(user_id)
-                else:
-                    raise UserNotFoundError(f"User with username {username} not found")
-            except KeycloakError as e:
-                log_keycloak_error(e)
-                raise TeamsServerError
+        Return the new list of team members.
+        """
+        team = self.get_team(team_id)
 
-        current_member_ids = set(
-            member["id"] for member in self.get_team_members(team_id)
-        )
+        target_members = {
+            user["id"]: user
+            for user in map_concurrently(self._resolve_user, set(usernames))
+        }
 
-        for user_id in target_member_ids.difference(current_member_ids):
-            try:
-                self.teams_admin_client.group_user_add(user_id, team_id)
-            except KeycloakError as e:
-                log_keycloak_error(e)
-                raise TeamsServerError
+        try:
+            current_members = {
+                member["id"]: member for member in self._get_group_members(team["id"])
+            }
+        except KeycloakError as e:
+            log_keycloak_error(e)
+            raise TeamsServerError
 
-        for user_id in current_member_ids.difference(target_member_ids):
+        changes = [
+            (self.teams_admin_client.group_user_add, user_id)
+            for user_id in target_members.keys() - current_members.keys()
+        ] + [
+            (self.teams_admin_client.group_user_remove, user_id)
+            for user_id in current_members.keys() - target_members.keys()
+        ]
+
+        def apply_change(change):
+            update_membership, user_id = change
             try:
-                self.teams_admin_client.group_user_remove(user_id, team_id)
+                update_membership(user_id, team["id"])
             except KeycloakError as e:
                 log_keycloak_error(e)
                 raise TeamsServerError
 
-        return self.get_team_members(team_id)
+        try:
+            map_concurrently(apply_change, changes)
+        finally:
+            invalidate("group_members", team["id"])
+            for user_id in target_members.keys() ^ current_members.keys():
+                user = target_members.get(user_id) or current_members[user_id]
+                self._user_teams.pop(user["username"])
+
+        # Prefer the representations from the group listing, which is what
+        # `get_team_members` would have returned.
+        members = [
+            current_members.get(user_id, user)
+            for user_id, user in target_members.items()
+        ]
+        return sorted(members, key=lambda member: member["username"])
 
     def get_user_by_username(self, username):
         try:
-            user_id = self.teams_admin_client.get_user_id(username)
-            if not user_id:
-                raise UserNotFoundError
-            return self.teams_admin_client.get_user(user_id)
+            user = self._get_user(username)
         except KeycloakError as e:
             log_keycloak_error(e)
             raise TeamsServerError
+        if not user:
+            raise UserNotFoundError
+        return user
+
+    def get_users_by_username(self, usernames):
+        """Return the users named in `usernames`, looked up concurrently.
+
+        Return a tuple of a dict of the users that were found, keyed by
+        username as given, and the usernames that weren't.
+        """
+        usernames = list(dict.fromkeys(usernames))
+        try:
+            users = map_concurrently(self._get_user, usernames)
+        except KeycloakError as e:
+            log_keycloak_error(e)
+            raise TeamsServerError
+
+        return (
+            {username: user for username, user in zip(usernames, users) if user},
+            [username for username, user in zip(usernames, users) if not user],
+        )
+
+    def get_user_id(self, username):
+        """Return the Keycloak user ID of `username`, or `None` if unknown."""
+        user = self._get_user(username)
+        return user and user["id"]
+
+    def _get_user(self, username):
+        """Return the user representation for `username`, or `None`.
+
+        Users are cached for `USER_CACHE_TTL` seconds, and unknown usernames
+        for `UNKNOWN_USER_CACHE_TTL` seconds.
+        """
+        # Keycloak usernames are case insensitive and stored in lower case.
+        username = username.lower()
+        user = self._users.get(username)
+
+        if user is None:
+            users = self.teams_admin_client.get_users(
+                query={"username": username, "exact": True, "max": 1}
+            )
+            if len(users) == 1:
+                user = users[0]
+                self._users.set(username, user)
+            else:
+                user = _UNKNOWN_USER
+                self._users.set(username, user, ttl=self.UNKNOWN_USER_CACHE_TTL)
+
+        return None if user is _UNKNOWN_USER else user
+
+    def _resolve_user(self, username):
+        """Return the user representation for `username`.
+
+        Raise `UserNotFoundError` if there is no such user.
+        """
+        try:
+            user = self._get_user(username)
+        except KeycloakError as e:
+            log_keycloak_error(e)
+            raise TeamsServerError
+
+        if not user:
+            raise UserNotFoundError(f"User with username {username} not found")
+
+        return user
+
+    def _get_group(self, group_id):
+        return memoized(
+            ("group", group_id),
+            lambda: self.teams_admin_client.get_group(group_id=group_id),
+        )
+
+    def _get_group_members(self, group_id, query=None):
+        return memoized(
+            ("group_members", group_id, tuple(sorted((query or {}).items()))),
+            lambda: self.teams_admin_client.get_group_members(
+                group_id=group_id, query=query
+            ),
+        )
+
+    def _get_team_catalogue(self):
+        """Return the `TeamCatalogue`, fetching it from Keycloak if stale."""
+        with self._team_catalogue_lock:
+            catalogue = self._team_catalogue.get("teams")
+            if catalogue is None:
+                catalogue = TeamCatalogue(self.teams_admin_client.get_groups())
+                self._team_catalogue.set("teams", catalogue)
+            return catalogue
+
+    def _find_group_by_name(self, group_name):
+        """Return the top level group named `group_name`, or `None`.
+
+        The search is done by Keycloak, so only matching groups are returned
+        regardless of how many groups there are in the realm.
+        """
+        groups = self.teams_admin_client.get_groups(
+            query={
+                "search": group_name,
+                "exact": "true",
+                "briefRepresentation": "true",
+                "first": 0,
+                "max": self.MAX_ITEMS_PER_PAGE,
+            }
+        )
+        return next((group for group in groups if group["name"] == group_name), None)
 
     def _get_groups_with_realm_role(self, role_name):
         """Return list of groups assigned specified realm role.
 
+        The groups of each role are cached for `REALM_ROLE_CACHE_TTL`
+        seconds.
+        """
+        groups = self._realm_role_groups.get(role_name)
+
+        if groups is None:
+            groups = self._fetch_groups_with_realm_role(role_name)
+            self._realm_role_groups.set(role_name, groups)
+
+        # Hand out copies, since callers are free to modify them.
+        return [dict(group) for group in groups]
+
+    def _fetch_groups_with_realm_role(self, role_name):
+        """Return list of groups assigned specified realm role from Keycloak.
+
         This is similar to `get_client_role_members` (which queries only users, not groups).
         https://github.com/marcospereirampj/python-keycloak/blob/master/keycloak/keycloak_admin.py#L1303
         https://www.keycloak.org/docs-api/15.1/rest-api/index.html#_roles_resource
@@ -233,39 +570,57 @@ class TeamsClient:
             }
         )
         try:
-            return list(self._get_all_raw(client_role_group_members_url))
+            return self._get_all_raw(client_role_group_members_url)
         except KeycloakGetError as e:
             if e.response_code == 404:
                 return []
             raise
 
     def _get_all_raw(self, url, params={}):
-        """Yield all from paginated results.
+        """Return all from paginated results.
+
+        The first page is fetched on its own. If it's full, the following
+        pages are fetched concurrently, `MAX_WORKERS` at a time, until a page
+        that isn't full is seen.
 
         Simplified re-implementation of python-keycloak internal method `__fetch_all`.
         https://github.com/marcospereirampj/python-keycloak/blob/master/keycloak/keycloak_admin.py#L209
 
         TODO: Could possibly be generalized and reused for resource_server.py::ResourceServer::_get_permissions.
         """
-        query_params = {
-            **params,
-            "max": self.MAX_ITEMS_PER_PAGE,
-            "first": 0,
-        }
 
-        while True:
-            partial_results = raise_error_from_response(
-                self.teams_admin_client.connection.raw_get(url, **query_params),
-                KeycloakGetError,
+        def get_page(first):
+            response = self.teams_admin_client.connection.raw_get(
+                url, **{**params, "max": self.MAX_ITEMS_PER_PAGE, "first": first}
             )
-            if partial_results:
-                for result in partial_results:
-                    yield result
+            if response.status_code != 200:
+                return raise_error_from_response(response, KeycloakGetError)
+            return fast_json.loads(response.content)
+
+        results = []
+        first = 0
+        num_pages = 1
+
+        while True:
+            offsets = [first + i * self.MAX_ITEMS_PER_PAGE for i in range(num_pages)]
+
+            for partial_results in map_concurrently(get_page, offsets):
+                results.extend(partial_results)
                 if len(partial_results) < self.MAX_ITEMS_PER_PAGE:
-                    return
-                query_params["first"] += len(partial_results)
-            else:
-                return
+                    return results
+
+            first += num_pages * self.MAX_ITEMS_PER_PAGE
+            num_pages = MAX_WORKERS
+
+
+@functools.cache
+def get_teams_client():
+    """Return a `TeamsClient` shared by every request in this container.
+
+    The client keeps its Admin API session alive across requests, saving a
+    login, an SSM lookup and a JWT signing per request.
+    """
+    return TeamsClient()
 
 
 def log_keycloak_error(keycloak_exception):
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 
-import requests
+import jwt
+
+from dataplatform_keycloak import discovery
 
 
 @dataclass
@@ -29,14 +31,7 @@ def _validate(url: str, base_url: str) -> str:
     return url
 
 
-def get_well_known(server_url: str, realm: str) -> UMAWellKnown:
-    url = f"{server_url}/auth/realms/{realm}/.well-known/uma2-configuration"
-
-    response = requests.get(url, timeout=15)
-    response.raise_for_status()
-
-    well_known = response.json()
-
+def _parse_well_known(well_known: dict, server_url: str) -> UMAWellKnown:
     return UMAWellKnown(
         token_endpoint=_validate(well_known["token_endpoint"], server_url),
         jwks_uri=_validate(well_known["jwks_uri"], server_url),
@@ -45,3 +40,21 @@ def get_well_known(server_url: str, realm: str) -> UMAWellKnown:
         ),
         policy_endpoint=_validate(well_known["policy_endpoint"], server_url),
     )
+
+
+def get_well_known(server_url: str, realm: str) -> UMAWellKnown:
+    """Return the UMA configuration of `realm`, cached by `discovery`."""
+    url = f"{server_url}/auth/realms/{realm}/.well-known/uma2-configuration"
+
+    return discovery.get_document(
+        url, lambda well_known: _parse_well_known(well_known, server_url)
+    )
+
+
+def get_jwks(jwks_uri: str, refresh: bool = False) -> jwt.PyJWKSet:
+    """Return the signing keys at `jwks_uri`, cached by `discovery`.
+
+    Pass `refresh=True` to fetch them regardless of what's cached, e.g. when
+    a token is signed by an unknown key.
+    """
+    return discovery.get_document(jwks_uri, jwt.PyJWKSet.from_dict, refresh=refresh)
@@ -3,6 +3,26 @@ import os
 from mangum import Mangum
 
 from app import app
+from resources.compression import CompressedAPIGateway
+from resources.warmup import start_warm_up, warm_up
 
 root_path = os.environ["ROOT_PATH"]
-handler = Mangum(app=app, api_gateway_base_path=root_path)
+asgi_handler = Mangum(
+    app=app,
+    api_gateway_base_path=root_path,
+    custom_handlers=[CompressedAPIGateway],
+)
+
+# Get going during Lambda init, so that the first request finds the Keycloak
+# clients (mostly) ready.
+start_warm_up()
+
+
+def handler(event, context):
+    # Scheduled warm events keep the container and its clients' tokens fresh;
+    # they're not requests.
+    if event.get("warm"):
+        warm_up(refresh=True)
+        return {"warm": True}
+
+    return asgi_handler(event, context)
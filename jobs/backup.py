@@ -1,22 +1,20 @@
-import json
 import os
 from datetime import datetime, timedelta
 
 import boto3
-from aws_xray_sdk.core import patch_all, xray_recorder
 from dateutil.relativedelta import relativedelta
 from okdata.aws.logging import logging_wrapper, log_add
 
+from dataplatform_keycloak import fast_json
 from dataplatform_keycloak.resource_server import ResourceServer
+from jobs.tracing import capture
 
 BACKUP_BUCKET_NAME = os.environ["BACKUP_BUCKET_NAME"]
 BACKUP_BUCKET_PREFIX = os.environ["SERVICE_NAME"]
 
-patch_all()
-
 
 @logging_wrapper
-@xray_recorder.capture("backup_permissions")
+@capture("backup_permissions")
 def backup_permissions(event, context):
     """Get all permissions and save to S3."""
     permissions = ResourceServer().list_permissions()
@@ -39,7 +37,7 @@ def write_to_s3(permissions_data):
     log_add(backup_object_key=backup_object_key)
 
     s3.put_object(
-        Body=str(json.dumps(permissions_data)),
+        Body=fast_json.dumps(permissions_data),
         Bucket=BACKUP_BUCKET_NAME,
         Key=backup_object_key,
     )
@@ -83,7 +81,7 @@ def load_latest_backup(max_age_in_weeks=12):
         return None
 
     obj = s3.get_object(Bucket=os.environ["BACKUP_BUCKET_NAME"], Key=backup_key)
-    permissions = json.loads(obj["Body"].read())
+    permissions = fast_json.loads(obj["Body"].read())
 
     log_add(backup_latest_permissions_count=len(permissions))
 
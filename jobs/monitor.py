@@ -2,21 +2,19 @@ import logging
 import os
 
 import requests
-from aws_xray_sdk.core import patch_all, xray_recorder
 from okdata.aws.logging import logging_wrapper, log_add, log_exception
 from okdata.aws.ssm import get_secret
 
 from dataplatform_keycloak.teams_client import TeamsClient
 from jobs.backup import load_latest_backup
+from jobs.tracing import capture
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 
-patch_all()
-
 
 @logging_wrapper
-@xray_recorder.capture("check_users")
+@capture("check_users")
 def check_users(event, context):
     """Get all users from permissions and notify about any deleted accounts.
 
@@ -24,7 +22,7 @@ def check_users(event, context):
     (fixed in Keycloak 18).
     """
 
-    keycloak_admin_client = TeamsClient().teams_admin_client
+    teams_client = TeamsClient()
 
     logger.info("Loading the latest backup...")
     permissions = load_latest_backup()
@@ -52,7 +50,7 @@ def check_users(event, context):
     logger.info(f"Fetching {num_users} users from Keycloak...")
     for i, username in enumerate(permission_users):
         logger.info(f"... fetching user {i + 1}/{num_users}")
-        if not keycloak_admin_client.get_user_id(username):
+        if not teams_client.get_user_id(username):
             missing_users.add(username)
 
     log_add(missing_users_count=len(missing_users))
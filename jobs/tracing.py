@@ -0,0 +1,33 @@
+"""Lazily loaded X-Ray tracing for the jobs."""
+
+import functools
+import threading
+
+_patched = False
+_patch_lock = threading.Lock()
+
+
+def capture(name):
+    """Trace calls to the decorated function in X-Ray as `name`.
+
+    Works like `xray_recorder.capture`, except that the X-Ray SDK is
+    imported, and the libraries it supports patched, on the first call
+    instead of when the job module is imported.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            global _patched
+            from aws_xray_sdk.core import patch_all, xray_recorder
+
+            with _patch_lock:
+                if not _patched:
+                    patch_all()
+                    _patched = True
+
+            return xray_recorder.capture(name)(f)(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
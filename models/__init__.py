@@ -3,10 +3,13 @@ from models.models import (
     MyPermissionsScopes,
     OkdataPermission,
     Team,
+    TeamBatch,
     TeamMember,
     UpdatePermissionBody,
     UpdateTeamBody,
     User,
+    UserLookup,
+    UserLookupBody,
     UserType,
 )
 
@@ -15,9 +18,12 @@ __all__ = [
     "MyPermissionsScopes",
     "OkdataPermission",
     "Team",
+    "TeamBatch",
     "TeamMember",
     "UpdatePermissionBody",
     "UpdateTeamBody",
     "User",
+    "UserLookup",
+    "UserLookupBody",
     "UserType",
 ]
@@ -1,16 +1,24 @@
 import logging
 import os
 from enum import Enum
-from typing import List, Union
-
-from pydantic import BaseModel, EmailStr, Field, HttpUrl, root_validator, validator
+from typing import Dict, List, Union
+
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    HttpUrl,
+    conlist,
+    root_validator,
+    validator,
+)
 
 from dataplatform_keycloak.groups import (
     group_attribute_to_team_attribute,
     group_name_to_team_name,
     is_team_attribute,
 )
-from models.scope import all_scopes, all_scopes_for_type
+from models.scope import all_scopes, all_scopes_for_type, is_known_scope
 from resources.resource_util import (
     resource_name_from_permission_name,
     resource_type_from_resource_name,
@@ -31,6 +39,26 @@ class User(BaseModel):
     user_type: UserType
 
 
+def _full_name(user):
+    return (
+        " ".join(
+            [
+                user.get("firstName", ""),
+                user.get("lastName", ""),
+            ]
+        ).strip()
+        or None
+    )
+
+
+def _team_attributes(group_attributes):
+    return {
+        group_attribute_to_team_attribute(key): value
+        for key, value in group_attributes.items()
+        if is_team_attribute(key)
+    }
+
+
 class TeamMember(BaseModel):
     username: str
     name: Union[str, None]
@@ -38,21 +66,30 @@ class TeamMember(BaseModel):
 
     @root_validator(pre=True)
     def check_values(cls, values):
-        values["name"] = (
-            " ".join(
-                [
-                    values.get("firstName", ""),
-                    values.get("lastName", ""),
-                ]
-            ).strip()
-            or None
-        )
+        values["name"] = _full_name(values)
         return values
 
+    @classmethod
+    def from_keycloak(cls, user: dict):
+        """Return a team member from a Keycloak user, skipping validation."""
+        values = {"username": user["username"], "name": _full_name(user)}
+        if "email" in user:
+            values["email"] = user["email"]
+        return cls.construct(**values)
+
     class Config:
         allow_population_by_field_name = True
 
 
+class UserLookupBody(BaseModel):
+    usernames: conlist(str, min_items=1, max_items=100)
+
+
+class UserLookup(BaseModel):
+    users: Dict[str, TeamMember]
+    not_found: List[str]
+
+
 class TeamAttributes(BaseModel):
     email: List[EmailStr] = []
     slack_url: List[HttpUrl] = Field([], alias="slack-url")
@@ -73,11 +110,30 @@ class Team(BaseModel):
 
     @validator("attributes", pre=True)
     def clean_attributes(cls, v):
-        return {
-            group_attribute_to_team_attribute(key): value
-            for key, value in v.items()
-            if is_team_attribute(key)
+        return _team_attributes(v)
+
+    @classmethod
+    def from_keycloak(cls, group: dict):
+        """Return a team from a Keycloak group, skipping validation.
+
+        `group` must have `is_member` set, like the groups returned by
+        `TeamsClient`.
+        """
+        values = {
+            "id": group["id"],
+            "name": group_name_to_team_name(group["name"]),
+            "is_member": group["is_member"],
         }
+        if "attributes" in group:
+            values["attributes"] = TeamAttributes.construct(
+                **_team_attributes(group["attributes"])
+            )
+        return cls.construct(**values)
+
+
+class TeamBatch(BaseModel):
+    teams: List[Team]
+    not_found: List[str]
 
 
 class UpdateTeamBody(BaseModel):
@@ -106,21 +162,26 @@ class OkdataPermission(BaseModel):
 
     @validator("scope")
     def check_scope(cls, scope):
-        known_scopes = all_scopes()
-        if scope not in known_scopes:
+        if not is_known_scope(scope):
             raise ValueError(
-                "Unknown scope: {}. Must be one of: {}".format(scope, known_scopes)
+                "Unknown scope: {}. Must be one of: {}".format(scope, all_scopes())
             )
         return scope
 
     @staticmethod
-    def from_uma_permission(uma_permission: dict):
+    def from_uma_permission(uma_permission: dict, validate=True):
+        """Return an `OkdataPermission` from a Keycloak UMA permission.
+
+        Pass `validate=False` to skip validation of permissions read back
+        from Keycloak, which were validated on their way in.
+        """
         scope, *extra_scopes = uma_permission["scopes"]
 
         if extra_scopes:
             logger.warning(f"Got unexpcted additional scopes: {extra_scopes}")
 
-        return OkdataPermission(
+        model = OkdataPermission if validate else OkdataPermission.construct
+        return model(
             resource_name=resource_name_from_permission_name(uma_permission["name"]),
             description=uma_permission["description"],
             scope=scope,
@@ -140,10 +201,11 @@ class UpdatePermissionBody(BaseModel):
 
     @validator("scope")
     def check_scope(cls, scope):
-        known_scopes = all_scopes() + ["__all__"]
-        if scope not in known_scopes:
+        if scope != "__all__" and not is_known_scope(scope):
             raise ValueError(
-                "Unknown scope: {}. Must be one of: {}".format(scope, known_scopes)
+                "Unknown scope: {}. Must be one of: {}".format(
+                    scope, all_scopes() + ["__all__"]
+                )
             )
         return scope
 
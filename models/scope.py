@@ -13,6 +13,9 @@ _SCOPES = {
     ],
 }
 
+# `_SCOPES` and the set of every scope defined in it, built on first use.
+_known_scopes = (None, frozenset())
+
 
 def all_scopes():
     """Return a list of every scope defined in `_SCOPES`."""
@@ -23,6 +26,19 @@ def all_scopes():
     return scopes
 
 
+def is_known_scope(scope):
+    """Return true if `scope` is defined in `_SCOPES`.
+
+    The set of known scopes is only rebuilt when `_SCOPES` is replaced.
+    """
+    global _known_scopes
+    scopes_definition, known_scopes = _known_scopes
+    if scopes_definition is not _SCOPES:
+        known_scopes = frozenset(all_scopes())
+        _known_scopes = (_SCOPES, known_scopes)
+    return scope in known_scopes
+
+
 def all_scopes_for_type(resource_type):
     """Return every defined scope for `resource_type`.
 
@@ -1,3 +1,4 @@
+import functools
 import os
 import logging
 
@@ -15,7 +16,9 @@ logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 
 
+@functools.cache
 def keycloak_client():
+    """Return a client for introspecting tokens, shared by every request."""
     client_id = os.environ["CLIENT_ID"]
     client_secret = os.environ.get("CLIENT_SECRET") or SsmClient.get_secret(
         f"/dataplatform/{client_id}/keycloak-client-secret"
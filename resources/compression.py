@@ -0,0 +1,131 @@
+"""Negotiated compression of responses.
+
+Responses are compressed with Brotli when the client accepts it and the
+`brotli` package is installed, otherwise with gzip. Responses smaller than
+the middleware's `minimum_size` are sent as is.
+
+Strong ETags only identify a single representation, so they are made weak
+when a response is compressed.
+"""
+
+import base64
+
+from mangum.handlers import APIGateway
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+
+COMPRESSED_ENCODINGS = ("br", "gzip", "deflate")
+
+
+def accepted_encodings(accept_encoding):
+    """Return the set of content codings accepted by `accept_encoding`.
+
+    Codings with a quality value of zero are left out.
+    """
+    encodings = set()
+
+    for coding in accept_encoding.split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.lower())
+
+    return encodings
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size, quality):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body, *, more_body):
+        body = self.compressor.process(body)
+        if more_body:
+            return body + self.compressor.flush()
+        return body + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress responses of at least `minimum_size` bytes.
+
+    Like Starlette's `GZipMiddleware`, but with Brotli support and proper
+    parsing of the `Accept-Encoding` header.
+    """
+
+    def __init__(
+        self, app, minimum_size=DEFAULT_MINIMUM_SIZE, gzip_level=6, brotli_quality=4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encodings = accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+
+        if brotli and encodings & {"br", "*"}:
+            responder = BrotliResponder(
+                self.app, self.minimum_size, quality=self.brotli_quality
+            )
+        elif encodings & {"gzip", "*"}:
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.gzip_level
+            )
+        else:
+            await IdentityResponder(self.app, self.minimum_size)(scope, receive, send)
+            return
+
+        async def send_with_weak_etag(message):
+            # Responders only set `Content-Encoding` on bodies they actually
+            # compress; small ones keep their strong ETag.
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("ETag")
+                if (
+                    etag
+                    and not etag.startswith("W/")
+                    and headers.get("Content-Encoding", "identity") != "identity"
+                ):
+                    headers["ETag"] = f"W/{etag}"
+            await send(message)
+
+        await responder(scope, receive, send_with_weak_etag)
+
+
+class CompressedAPIGateway(APIGateway):
+    """Mangum handler for API Gateway that always base64 encodes compressed bodies.
+
+    Mangum only base64 encodes JSON bodies that aren't valid UTF-8, which
+    compressed bodies occasionally are. API Gateway must be configured with
+    binary media types for it to decode them again.
+    """
+
+    def __call__(self, response):
+        result = super().__call__(response)
+
+        content_encoding = result["headers"].get("content-encoding", "").lower()
+        if content_encoding in COMPRESSED_ENCODINGS and not result["isBase64Encoded"]:
+            result["body"] = base64.b64encode(response["body"]).decode()
+            result["isBase64Encoded"] = True
+
+        return result
@@ -0,0 +1,126 @@
+"""Conditional GET support through entity tags.
+
+Successful GET responses get an `ETag` computed from their body. Requests
+whose `If-None-Match` header matches it get an empty `304 Not Modified`
+response instead, saving the transfer of the body.
+"""
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Responses depend on the caller's permissions. Clients may keep them, but
+# should revalidate them before every use.
+CACHE_CONTROL = "private, no-cache"
+
+# Headers kept in `304 Not Modified` responses (RFC 9110, section 15.4.5).
+NOT_MODIFIED_HEADERS = {
+    "cache-control",
+    "content-location",
+    "date",
+    "etag",
+    "expires",
+    "vary",
+}
+
+
+def compute_etag(body):
+    """Return a strong entity tag for `body`."""
+    return '"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def _opaque_tag(etag):
+    return etag.strip().removeprefix("W/")
+
+
+def matching_tag(if_none_match, etag):
+    """Return the entity tag in the `if_none_match` header value matching `etag`.
+
+    Uses weak comparison, as required for `If-None-Match`. Return `etag` if
+    the header is `*`, and `None` if nothing matches.
+    """
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        if tag.strip() and _opaque_tag(tag) == _opaque_tag(etag):
+            return tag.strip()
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    """Return true if `etag` is matched by the `if_none_match` header value.
+
+    Uses weak comparison, as required for `If-None-Match`.
+    """
+    return matching_tag(if_none_match, etag) is not None
+
+
+class ETagMiddleware:
+    """Add ETags to GET responses, and answer matching requests with 304.
+
+    Bodies of successful responses are buffered in order to hash them, which
+    also turns streamed responses (like those passed through
+    `BaseHTTPMiddleware`) into plain ones.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("If-None-Match")
+        start_message = None
+        body = []
+
+        async def send_with_etag(message):
+            nonlocal start_message
+
+            if start_message is None:
+                if message["type"] == "http.response.start" and (
+                    message["status"] == 200
+                ):
+                    # Hold on to it until the whole body has been seen.
+                    start_message = message
+                else:
+                    await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body_bytes = b"".join(body)
+
+            if "etag" not in headers and self._add_etag(
+                headers, body_bytes, if_none_match
+            ):
+                for name in {key.lower() for key in headers.keys()}:
+                    if name not in NOT_MODIFIED_HEADERS:
+                        del headers[name]
+                await send({**start_message, "status": 304})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            headers["Content-Length"] = str(len(body_bytes))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body_bytes})
+
+        await self.app(scope, receive, send_with_etag)
+
+    @staticmethod
+    def _add_etag(headers, body, if_none_match):
+        """Set the caching headers for `body`.
+
+        Return true if the client's copy, given by `if_none_match`, is
+        current. The ETag is then the one the client has, which is weak if
+        the client got a compressed copy.
+        """
+        etag = compute_etag(body)
+        client_etag = if_none_match and matching_tag(if_none_match, etag)
+        headers["ETag"] = client_etag or etag
+        headers.setdefault("Cache-Control", CACHE_CONTROL)
+        return bool(client_etag)
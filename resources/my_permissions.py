@@ -5,12 +5,13 @@ from typing import Union
 from fastapi import Depends, APIRouter, status
 from requests.exceptions import HTTPError
 
-from dataplatform_keycloak.resource_server import ResourceServer
+from dataplatform_keycloak.resource_server import ResourceServer, get_resource_server
 from dataplatform_keycloak.uma_well_known import WellKnownConfigException
 from models import MyPermissionsScopes
 from resources.authorizer import AuthInfo
 from resources.errors import ErrorResponse, error_message_models
 from resources.resource_util import resource_type_from_resource_name
+from resources.responses import FastJSONResponse
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
@@ -18,7 +19,7 @@ logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 
 def resource_server():
     try:
-        return ResourceServer()
+        return get_resource_server()
     except WellKnownConfigException as e:
         raise ErrorResponse(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
@@ -31,6 +32,7 @@ router = APIRouter()
     dependencies=[Depends(AuthInfo)],
     status_code=status.HTTP_200_OK,
     response_model=dict[str, MyPermissionsScopes],
+    response_class=FastJSONResponse,
     responses=error_message_models(
         status.HTTP_400_BAD_REQUEST, status.HTTP_500_INTERNAL_SERVER_ERROR
     ),
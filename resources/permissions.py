@@ -8,11 +8,12 @@ from dataplatform_keycloak.exceptions import (
     CannotRemoveOnlyAdminException,
     ResourceNotFoundError,
 )
-from dataplatform_keycloak.resource_server import ResourceServer
+from dataplatform_keycloak.resource_server import ResourceServer, get_resource_server
 from dataplatform_keycloak.uma_well_known import WellKnownConfigException
 from models import OkdataPermission, UpdatePermissionBody
 from resources.authorizer import has_resource_permission
 from resources.errors import ErrorResponse, error_message_models
+from resources.responses import FastJSONResponse
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
@@ -20,7 +21,7 @@ logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 
 def resource_server():
     try:
-        return ResourceServer()
+        return get_resource_server()
     except WellKnownConfigException as e:
         raise ErrorResponse(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
@@ -77,6 +78,7 @@ def update_permission(
     dependencies=[Depends(has_resource_permission("admin"))],
     status_code=status.HTTP_200_OK,
     response_model=list[OkdataPermission],
+    response_class=FastJSONResponse,
     responses=error_message_models(
         status.HTTP_400_BAD_REQUEST,
         status.HTTP_403_FORBIDDEN,
@@ -89,10 +91,14 @@ def get_permissions(
     resource_server: ResourceServer = Depends(resource_server),
 ):
     try:
-        return [
-            OkdataPermission.from_uma_permission(p)
-            for p in resource_server.list_permissions(resource_name)
-        ]
+        # Rendered here, since `response_model` would validate the trusted
+        # Keycloak data all over again. The fields are all JSON ready.
+        return FastJSONResponse(
+            [
+                OkdataPermission.from_uma_permission(p, validate=False).dict()
+                for p in resource_server.list_permissions(resource_name)
+            ]
+        )
     except HTTPError as e:
         keycloak_response = e.response
         logger.info(f"Keycloak response status code: {keycloak_response.status_code}")
@@ -4,7 +4,7 @@ import os
 from fastapi import APIRouter, Depends, Path, status
 from requests.exceptions import HTTPError
 
-from dataplatform_keycloak.resource_server import ResourceServer
+from dataplatform_keycloak.resource_server import ResourceServer, get_resource_server
 from dataplatform_keycloak.uma_well_known import WellKnownConfigException
 from models import CreateResourceBody
 from resources.authorizer import has_scope_permission
@@ -16,7 +16,7 @@ logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
 
 def resource_server():
     try:
-        return ResourceServer()
+        return get_resource_server()
     except WellKnownConfigException as e:
         raise ErrorResponse(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
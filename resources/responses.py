@@ -0,0 +1,13 @@
+from fastapi.responses import JSONResponse
+
+from dataplatform_keycloak import fast_json
+
+
+class FastJSONResponse(JSONResponse):
+    """A `JSONResponse` rendered with orjson, when available.
+
+    Used for the listing endpoints, whose responses can get large.
+    """
+
+    def render(self, content) -> bytes:
+        return fast_json.dumps(content)
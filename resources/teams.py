@@ -1,40 +1,177 @@
 from typing import List, Union
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.encoders import jsonable_encoder
 
+from dataplatform_keycloak.concurrency import run_concurrently
 from dataplatform_keycloak.exceptions import (
     TeamNameExistsError,
     TeamNotFoundError,
     TeamsServerError,
     UserNotFoundError,
 )
-from dataplatform_keycloak.groups import group_ids
-from dataplatform_keycloak.teams_client import TeamsClient
-from models import Team, TeamMember, UpdateTeamBody
+from dataplatform_keycloak.teams_client import TeamsClient, get_teams_client
+from models import (
+    Team,
+    TeamBatch,
+    TeamMember,
+    UpdateTeamBody,
+    UserLookup,
+    UserLookupBody,
+)
 from resources.authorizer import AuthInfo
 from resources.errors import ErrorResponse, error_message_models
+from resources.responses import FastJSONResponse
 
 router = APIRouter(dependencies=[Depends(AuthInfo)])
 
+# Paginated listings return the cursor of the next page in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Maximum number of teams to fetch by ID in one request.
+MAX_BATCH_SIZE = 100
+
+
+def _page_limit(cursor, limit):
+    """Return the page size to use, or `None` if pagination isn't requested."""
+    if limit is None and cursor is not None:
+        return DEFAULT_PAGE_SIZE
+    return limit
+
+
+def _cursor_offset(cursor):
+    """Return the offset encoded in `cursor`.
+
+    Cursors are opaque to clients, but are simply the offset of the first
+    item on the page.
+    """
+    if cursor is None:
+        return 0
+    if not cursor.isdigit():
+        raise ErrorResponse(status.HTTP_400_BAD_REQUEST, "Invalid cursor")
+    return int(cursor)
+
+
+def _parse_fields(fields, model):
+    """Return the set of field names from the comma separated `fields`.
+
+    Raise `ErrorResponse` if any of them are unknown to `model`.
+    """
+    if fields is None:
+        return None
+
+    field_names = {field.strip() for field in fields.split(",") if field.strip()}
+    if unknown_fields := field_names - model.__fields__.keys():
+        raise ErrorResponse(
+            status.HTTP_400_BAD_REQUEST,
+            "Unknown field(s): {}".format(", ".join(sorted(unknown_fields))),
+        )
+    return field_names
+
+
+def _list_response(
+    items, model, response, fields=None, next_cursor=None, exclude_unset=False
+):
+    """Return a listing of `items` with only `fields` included, if given.
+
+    Projected listings are rendered here, bypassing the route's response
+    model, so `exclude_unset` should match the route's setting. `model` must
+    have a `from_keycloak` constructor.
+    """
+    if fields is not None:
+        projected_response = FastJSONResponse(
+            jsonable_encoder(
+                [
+                    model.from_keycloak(item).dict(
+                        include=fields, by_alias=True, exclude_unset=exclude_unset
+                    )
+                    for item in items
+                ]
+            )
+        )
+        if next_cursor is not None:
+            projected_response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return projected_response
+
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return items
+
+
+def _get_teams_by_id(team_ids, has_role, auth_info, teams_client):
+    team_ids = [team_id.strip() for team_id in team_ids.split(",") if team_id.strip()]
+    if len(team_ids) > MAX_BATCH_SIZE:
+        raise ErrorResponse(
+            status.HTTP_400_BAD_REQUEST,
+            f"Too many team IDs (maximum is {MAX_BATCH_SIZE})",
+        )
+
+    try:
+        member_of, (teams, not_found) = run_concurrently(
+            lambda: teams_client.user_team_ids(auth_info.principal_id),
+            lambda: teams_client.get_teams(team_ids, realm_role=has_role),
+        )
+    except TeamsServerError:
+        raise ErrorResponse(
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "Server error",
+        )
+
+    for team in teams:
+        team["is_member"] = team["id"] in member_of
+
+    # Rendered here to include unset attributes like `GET /teams/{team_id}`
+    # does, which the listing's `response_model_exclude_unset` would drop.
+    return FastJSONResponse(
+        jsonable_encoder(TeamBatch(teams=teams, not_found=not_found))
+    )
+
 
 @router.get(
     "",
     status_code=status.HTTP_200_OK,
-    response_model=List[Team],
+    response_model=Union[List[Team], TeamBatch],
+    response_class=FastJSONResponse,
     response_model_exclude_unset=True,
 )
 def get_teams(
+    response: Response,
     include: Union[str, None] = None,
     has_role: Union[str, None] = None,
+    ids: Union[str, None] = None,
+    cursor: Union[str, None] = None,
+    limit: Union[int, None] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Union[str, None] = None,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
+    """List teams.
+
+    Results can be paginated by giving `limit`, and optionally a `cursor`
+    from the `X-Next-Cursor` header of the previous page. `fields` is a comma
+    separated list of the fields to include for each team.
+
+    When `ids` is given as a comma separated list of team IDs, only those
+    teams are fetched, regardless of membership. They're returned as a
+    `TeamBatch`, listing the IDs that weren't found separately.
+    """
+    if ids is not None:
+        return _get_teams_by_id(ids, has_role, auth_info, teams_client)
+
+    fields = _parse_fields(fields, Team)
+    offset = _cursor_offset(cursor)
+    limit = _page_limit(cursor, limit)
+
     try:
-        user_teams = teams_client.list_user_teams(auth_info.principal_id)
-        teams = teams_client.list_teams(realm_role=has_role)
-        groups = group_ids(user_teams)
+        member_of, teams = run_concurrently(
+            lambda: teams_client.user_team_ids(auth_info.principal_id),
+            lambda: teams_client.list_teams(realm_role=has_role),
+        )
         for team in teams:
-            team["is_member"] = team["id"] in groups
+            team["is_member"] = team["id"] in member_of
 
     except TeamsServerError:
         raise ErrorResponse(
@@ -42,7 +179,18 @@ def get_teams(
             "Server error",
         )
 
-    return teams if include == "all" else [team for team in teams if team["is_member"]]
+    if include != "all":
+        teams = [team for team in teams if team["is_member"]]
+
+    next_cursor = None
+    if limit is not None:
+        if offset + limit < len(teams):
+            next_cursor = str(offset + limit)
+        teams = teams[offset : offset + limit]
+
+    return _list_response(
+        teams, Team, response, fields, next_cursor, exclude_unset=True
+    )
 
 
 @router.get(
@@ -57,12 +205,14 @@ def get_team(
     team_id: str,
     has_role: Union[str, None] = None,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
     try:
-        user_teams = teams_client.list_user_teams(auth_info.principal_id)
-        team = teams_client.get_team(team_id, realm_role=has_role)
-        team["is_member"] = team["id"] in group_ids(user_teams)
+        member_of, team = run_concurrently(
+            lambda: teams_client.user_team_ids(auth_info.principal_id),
+            lambda: teams_client.get_team(team_id, realm_role=has_role),
+        )
+        team["is_member"] = team["id"] in member_of
     except TeamNotFoundError:
         raise ErrorResponse(status.HTTP_404_NOT_FOUND, "Team not found")
     except TeamsServerError:
@@ -85,12 +235,14 @@ def get_team_by_name(
     team_name: str,
     has_role: Union[str, None] = None,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
     try:
-        user_teams = teams_client.list_user_teams(auth_info.principal_id)
-        team = teams_client.get_team_by_name(team_name, realm_role=has_role)
-        team["is_member"] = team["id"] in group_ids(user_teams)
+        member_of, team = run_concurrently(
+            lambda: teams_client.user_team_ids(auth_info.principal_id),
+            lambda: teams_client.get_team_by_name(team_name, realm_role=has_role),
+        )
+        team["is_member"] = team["id"] in member_of
     except TeamNotFoundError:
         raise ErrorResponse(status.HTTP_404_NOT_FOUND, "Team not found")
     except TeamsServerError:
@@ -105,17 +257,41 @@ def get_team_by_name(
     "/{team_id}/members",
     status_code=status.HTTP_200_OK,
     response_model=List[TeamMember],
+    response_class=FastJSONResponse,
     responses=error_message_models(
         status.HTTP_404_NOT_FOUND,
     ),
 )
 def get_team_members(
     team_id: str,
+    response: Response,
+    cursor: Union[str, None] = None,
+    limit: Union[int, None] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Union[str, None] = None,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
+    """List the members of a team.
+
+    Pagination and projection work like for the team listing.
+    """
+    fields = _parse_fields(fields, TeamMember)
+    offset = _cursor_offset(cursor)
+    limit = _page_limit(cursor, limit)
+
     try:
-        return teams_client.get_team_members(team_id)
+        if limit is None:
+            members = teams_client.get_team_members(team_id)
+            next_cursor = None
+        else:
+            # Ask for one extra member to find out whether there's a next page.
+            members = teams_client.get_team_members(
+                team_id, first=offset, max_results=limit + 1
+            )
+            next_cursor = str(offset + limit) if len(members) > limit else None
+            members = members[:limit]
+
+        return _list_response(members, TeamMember, response, fields, next_cursor)
     except TeamNotFoundError:
         raise ErrorResponse(status.HTTP_404_NOT_FOUND, "Team not found")
     except TeamsServerError:
@@ -138,12 +314,15 @@ def update_team(
     team_id: str,
     body: UpdateTeamBody,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
     try:
-        user_teams = teams_client.list_user_teams(auth_info.principal_id)
-        team = teams_client.get_team(team_id)
-        if team["id"] not in group_ids(user_teams):
+        # Don't trust the cached memberships when authorizing changes.
+        member_of, team = run_concurrently(
+            lambda: teams_client.user_team_ids(auth_info.principal_id, cached=False),
+            lambda: teams_client.get_team(team_id),
+        )
+        if team["id"] not in member_of:
             raise ErrorResponse(status.HTTP_403_FORBIDDEN, "Forbidden")
         team = teams_client.update_team(team_id, body.name, body.attributes)
         team["is_member"] = True
@@ -165,6 +344,7 @@ def update_team(
     "/{team_id}/members",
     status_code=status.HTTP_200_OK,
     response_model=List[TeamMember],
+    response_class=FastJSONResponse,
     responses=error_message_models(
         status.HTTP_404_NOT_FOUND,
     ),
@@ -173,12 +353,15 @@ def update_members(
     team_id: str,
     body: List[str],
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
     try:
-        user_teams = teams_client.list_user_teams(auth_info.principal_id)
-        team = teams_client.get_team(team_id)
-        if team["id"] not in group_ids(user_teams):
+        # Don't trust the cached memberships when authorizing changes.
+        member_of, team = run_concurrently(
+            lambda: teams_client.user_team_ids(auth_info.principal_id, cached=False),
+            lambda: teams_client.get_team(team_id),
+        )
+        if team["id"] not in member_of:
             raise ErrorResponse(status.HTTP_403_FORBIDDEN, "Forbidden")
         return teams_client.update_members(team_id, body)
     except TeamNotFoundError:
@@ -192,6 +375,28 @@ def update_members(
         )
 
 
+@router.post(
+    "/users:lookup",
+    status_code=status.HTTP_200_OK,
+    response_model=UserLookup,
+    response_class=FastJSONResponse,
+)
+def lookup_users(
+    body: UserLookupBody,
+    auth_info: AuthInfo = Depends(),
+    teams_client: TeamsClient = Depends(get_teams_client),
+):
+    """Look up every user in `body.usernames` at once."""
+    try:
+        users, not_found = teams_client.get_users_by_username(body.usernames)
+    except TeamsServerError:
+        raise ErrorResponse(
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "Server error",
+        )
+    return {"users": users, "not_found": not_found}
+
+
 @router.get(
     "/users/{username}",
     status_code=status.HTTP_200_OK,
@@ -203,7 +408,7 @@ def update_members(
 def get_user_by_username(
     username: str,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
     try:
         return teams_client.get_user_by_username(username)
@@ -220,21 +425,23 @@ def get_user_by_username(
     "/users/{username}/teams",
     status_code=status.HTTP_200_OK,
     response_model=List[Team],
+    response_class=FastJSONResponse,
     response_model_exclude_unset=True,
 )
 def get_teams_by_username(
     username: str,
     auth_info: AuthInfo = Depends(),
-    teams_client: TeamsClient = Depends(TeamsClient),
+    teams_client: TeamsClient = Depends(get_teams_client),
 ):
     """List teams in which the user given by `username` is a member."""
     try:
-        username_teams = teams_client.list_user_teams(username)
-        user_teams = teams_client.list_user_teams(auth_info.principal_id)
-        groups = group_ids(user_teams)
+        username_teams, member_of = run_concurrently(
+            lambda: teams_client.list_user_teams(username),
+            lambda: teams_client.user_team_ids(auth_info.principal_id),
+        )
 
         for team in username_teams:
-            team["is_member"] = team["id"] in groups
+            team["is_member"] = team["id"] in member_of
 
         return username_teams
 
@@ -0,0 +1,75 @@
+"""Warm-up of the Keycloak clients shared by requests.
+
+On a cold container the first request would otherwise pay for well-known
+discovery, SSM lookups, access tokens, signing keys and an admin login, one
+after the other. Warming up does all of it concurrently ahead of time.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from dataplatform_keycloak.concurrency import map_concurrently
+from dataplatform_keycloak.resource_server import get_resource_server
+from dataplatform_keycloak.teams_client import get_teams_client
+from resources.authorizer import keycloak_client
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get("LOG_LEVEL", logging.INFO))
+
+# Seconds between scheduled warm events (see serverless.yaml). Warm-ups renew
+# tokens that would expire before the next one.
+WARM_EVENT_INTERVAL = 300
+
+# Warm-up tasks, called with the number of seconds that tokens must remain
+# valid for.
+WARM_UP_TASKS = {
+    "resource_server": lambda min_validity: get_resource_server().warm_up(min_validity),
+    "keycloak_client": lambda min_validity: keycloak_client(),
+    "teams_client": lambda min_validity: get_teams_client().warm_up(min_validity),
+}
+
+_warm_up_lock = threading.Lock()
+_warmed_up = False
+
+
+def _run_task(name):
+    start = time.perf_counter()
+    try:
+        WARM_UP_TASKS[name](WARM_EVENT_INTERVAL)
+    except Exception as e:
+        # Whatever failed is initialized by the first request needing it.
+        logger.warning(f"Warm-up of {name} failed: {e}")
+        return False
+    logger.info(f"Warmed up {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return True
+
+
+def warm_up(refresh=False):
+    """Initialize the shared Keycloak clients, once per container.
+
+    Every task is run concurrently. Failures are logged, but never raised.
+    Callers arriving while a warm-up is in progress wait for it to finish.
+
+    Pass `refresh=True` to run the tasks again in a warmed up container,
+    renewing tokens that are about to expire, e.g. for scheduled warm events.
+
+    Return a dict of task name to whether it succeeded, or `None` if the
+    container was already warmed up.
+    """
+    global _warmed_up
+
+    with _warm_up_lock:
+        if _warmed_up and not refresh:
+            return None
+        results = dict(zip(WARM_UP_TASKS, map_concurrently(_run_task, WARM_UP_TASKS)))
+        _warmed_up = True
+        return results
+
+
+def start_warm_up():
+    """Start warming up in a background thread, and return the thread."""
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
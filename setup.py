@@ -21,9 +21,14 @@ setup(
         "mangum>=0.10.0",
         "okdata-aws>=6",
         "okdata-resource-auth>=0.1.4",
+        "orjson>=3",
         "pydantic[email]~=1.10.0",
         "pyjwt>=2.5",
         "python-keycloak>=3,<4",
         "requests",
     ],
+    extras_require={
+        # Enables Brotli compression of responses, when accepted by clients.
+        "brotli": ["brotli"],
+    },
 )
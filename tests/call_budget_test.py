@@ -0,0 +1,202 @@
+"""Upper bounds on the Keycloak calls made by each endpoint.
+
+Budgets are given per Keycloak stub endpoint (see `tests.keycloak_stub`) for
+a warm container, i.e. after the same kind of request has been served once.
+Lower a budget when an optimization saves calls, so that regressions are
+caught.
+"""
+
+import pytest
+
+from models.scope import all_scopes_for_type, scope_permission
+
+DATASET = "okdata:dataset:my-dataset"
+OWNER = "janedoe"
+SUPERUSER = "superuser"
+
+
+@pytest.fixture
+def realm(keycloak_stub):
+    stub = keycloak_stub
+    team_ids = [stub.add_group(f"TEAM-team{i}") for i in range(5)]
+    stub.add_user(OWNER, groups=team_ids[:2])
+    stub.add_user("homersimpson", groups=team_ids[2:])
+    stub.add_user(SUPERUSER)
+    stub.grant_scope("keycloak:resource:admin", SUPERUSER)
+
+    scopes = all_scopes_for_type("okdata:dataset")
+    resource_id = stub.add_resource(DATASET, "okdata:dataset", scopes)
+    for scope in scopes:
+        stub.add_permission(
+            f"{DATASET}:{scope_permission(scope)}", resource_id, [scope], users=[OWNER]
+        )
+
+    return {"team_id": team_ids[0], "team_ids": team_ids}
+
+
+SCENARIOS = {
+    "get permissions": (
+        OWNER,
+        lambda realm, i: ("GET", f"/permissions/{DATASET}", None),
+        {
+            "introspect": 1,
+            "token": 2,
+            "resource_set": 1,
+            "resource": 1,
+            "uma_policy": 2,
+        },
+    ),
+    # Target: at most 3 Keycloak calls on a warm container. That's out of
+    # reach for now: the authorization checks alone introspect the token and
+    # exchange it for UMA tickets (admin scope, then resource scope). The
+    # update itself reads the permission, writes it and reads it back.
+    "update permission, single scope": (
+        OWNER,
+        lambda realm, i: (
+            "PUT",
+            f"/permissions/{DATASET}",
+            {
+                "add_users": [{"user_id": "homersimpson", "user_type": "user"}],
+                "scope": "okdata:dataset:read",
+            },
+        ),
+        {
+            "introspect": 1,
+            "token": 2,
+            "uma_policy": 3,
+        },
+    ),
+    "update permission, all scopes": (
+        OWNER,
+        lambda realm, i: (
+            "PUT",
+            f"/permissions/{DATASET}",
+            {
+                "add_users": [{"user_id": "homersimpson", "user_type": "user"}],
+                "scope": "__all__",
+            },
+        ),
+        {
+            "introspect": 1,
+            "token": 2,
+            "uma_policy": 12,
+        },
+    ),
+    "create resource": (
+        SUPERUSER,
+        lambda realm, i: (
+            "POST",
+            "/permissions",
+            {
+                "owner": {"user_id": OWNER, "user_type": "user"},
+                "resource_name": f"okdata:dataset:new-{i}",
+            },
+        ),
+        {
+            "introspect": 1,
+            "token": 1,
+            "resource_set": 1,
+            "uma_policy": 4,
+        },
+    ),
+    "delete resource": (
+        SUPERUSER,
+        lambda realm, i: ("DELETE", f"/permissions/{DATASET}-{i}", None),
+        {
+            "introspect": 1,
+            "token": 1,
+            "resource_set": 1,
+            "resource": 2,
+        },
+    ),
+    "my permissions": (
+        OWNER,
+        lambda realm, i: ("GET", "/my_permissions", None),
+        {"introspect": 1, "token": 1},
+    ),
+    "list teams": (
+        OWNER,
+        lambda realm, i: ("GET", "/teams?include=all", None),
+        {"introspect": 1},
+    ),
+    "get teams by ID": (
+        OWNER,
+        lambda realm, i: ("GET", f"/teams?ids={','.join(realm['team_ids'])}", None),
+        {"introspect": 1, "group": 5},
+    ),
+    "get team": (
+        OWNER,
+        lambda realm, i: ("GET", f"/teams/{realm['team_id']}", None),
+        {"introspect": 1, "group": 1},
+    ),
+    "get team by name": (
+        OWNER,
+        lambda realm, i: ("GET", "/teams/name/team0", None),
+        {"introspect": 1, "groups": 1, "group": 1},
+    ),
+    "get team members": (
+        OWNER,
+        lambda realm, i: ("GET", f"/teams/{realm['team_id']}/members", None),
+        {"introspect": 1, "group": 1, "group_members": 1},
+    ),
+    "update team": (
+        OWNER,
+        lambda realm, i: (
+            "PATCH",
+            f"/teams/{realm['team_id']}",
+            {"attributes": {"email": ["team0@example.org"]}},
+        ),
+        {"introspect": 1, "user_groups": 1, "group": 2},
+    ),
+    "update team members": (
+        OWNER,
+        lambda realm, i: (
+            "PUT",
+            f"/teams/{realm['team_id']}/members",
+            [OWNER, "homersimpson"],
+        ),
+        {"introspect": 1, "user_groups": 1, "group": 1, "group_members": 1},
+    ),
+    "get user": (
+        OWNER,
+        lambda realm, i: ("GET", "/teams/users/homersimpson", None),
+        {"introspect": 1},
+    ),
+    "get user teams": (
+        OWNER,
+        lambda realm, i: ("GET", "/teams/users/homersimpson/teams", None),
+        {"introspect": 1},
+    ),
+    "look up users": (
+        OWNER,
+        lambda realm, i: (
+            "POST",
+            "/teams/users:lookup",
+            {"usernames": [OWNER, "homersimpson", "nobody"]},
+        ),
+        {"introspect": 1},
+    ),
+}
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_call_budget(keycloak_stub, stub_client, realm, scenario):
+    username, request, budget = SCENARIOS[scenario]
+    headers = {"Authorization": f"Bearer {keycloak_stub.token_for(username)}"}
+
+    if scenario == "delete resource":
+        for i in range(2):
+            keycloak_stub.add_resource(f"{DATASET}-{i}", "okdata:dataset", [])
+
+    for i in range(2):
+        method, url, body = request(realm, i)
+        keycloak_stub.calls.clear()
+        response = stub_client.request(method, url, headers=headers, json=body)
+        assert response.status_code < 400, response.text
+
+    over_budget = {
+        endpoint: f"{count} > {budget.get(endpoint, 0)}"
+        for endpoint, count in keycloak_stub.calls.items()
+        if count > budget.get(endpoint, 0)
+    }
+    assert not over_budget, f"Keycloak calls over budget: {over_budget}"
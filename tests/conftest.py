@@ -3,12 +3,31 @@ from fastapi.testclient import TestClient
 
 import tests.setup.local_keycloak_config as kc_config
 from app import app
+from dataplatform_keycloak import discovery
+from dataplatform_keycloak.resource_server import ResourceServer, get_resource_server
 from dataplatform_keycloak.ssm import SsmClient
+from dataplatform_keycloak.teams_client import TeamsClient, get_teams_client
+from resources import my_permissions, permissions, resources
+from resources.authorizer import keycloak_client
+from tests.keycloak_stub import (
+    RESOURCE_SERVER_CLIENT_ID,
+    RESOURCE_SERVER_CLIENT_SECRET,
+    TEAM_ADMIN_PASSWORD,
+    TEAM_ADMIN_USERNAME,
+    KeycloakStub,
+)
+
+
+def clear_shared_clients():
+    for get_client in (get_resource_server, get_teams_client, keycloak_client):
+        get_client.cache_clear()
 
 
 @pytest.fixture
 def mock_client(mock_ssm_client):
     app.debug = True
+    # Tests may recreate the realm, invalidating the shared clients' sessions.
+    clear_shared_clients()
     return TestClient(app)
 
 
@@ -31,3 +50,57 @@ def mock_ssm_client(monkeypatch):
         return None
 
     monkeypatch.setattr(SsmClient, "get_secret", get_secret)
+
+
+@pytest.fixture(autouse=True)
+def discovery_cache(monkeypatch, tmp_path):
+    """Keep discovery documents cached by a test to itself."""
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_DIR", str(tmp_path / "discovery"))
+    discovery.clear()
+    yield
+    discovery.clear()
+
+
+@pytest.fixture
+def keycloak_stub(monkeypatch):
+    stub = KeycloakStub()
+    for key, value in stub.environ().items():
+        monkeypatch.setenv(key, value)
+    # The shared clients are configured from the environment when created.
+    clear_shared_clients()
+
+    with stub:
+        yield stub
+
+    clear_shared_clients()
+
+
+@pytest.fixture
+def stub_resource_server(keycloak_stub):
+    return ResourceServer(
+        client_secret_key=RESOURCE_SERVER_CLIENT_SECRET,
+        keycloak_server_url=keycloak_stub.server_url,
+        keycloak_realm=keycloak_stub.realm,
+        resource_server_client_id=RESOURCE_SERVER_CLIENT_ID,
+    )
+
+
+@pytest.fixture
+def stub_teams_client(keycloak_stub):
+    return TeamsClient(
+        keycloak_server_url=keycloak_stub.server_url,
+        keycloak_admin_api_url=None,
+        keycloak_realm=keycloak_stub.realm,
+        teams_admin_username=TEAM_ADMIN_USERNAME,
+        teams_admin_password=TEAM_ADMIN_PASSWORD,
+    )
+
+
+@pytest.fixture
+def stub_client(stub_resource_server, stub_teams_client):
+    """A client for the app, backed by `keycloak_stub`."""
+    for module in (permissions, resources, my_permissions):
+        app.dependency_overrides[module.resource_server] = lambda: stub_resource_server
+    app.dependency_overrides[get_teams_client] = lambda: stub_teams_client
+    yield TestClient(app)
+    app.dependency_overrides.clear()
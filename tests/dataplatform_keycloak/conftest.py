@@ -0,0 +1,155 @@
+import json
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from keycloak.exceptions import KeycloakGetError
+from requests import Response
+
+from dataplatform_keycloak.teams_client import TeamsClient
+
+
+class MockKeycloakAdmin:
+    """Minimal in-memory stand-in for `TeamsKeycloakAdmin`.
+
+    Every call is counted in `calls`, keyed by method name.
+    """
+
+    def __init__(self):
+        self.connection = SimpleNamespace(realm_name="mock", raw_get=self._raw_get)
+        self.calls = Counter()
+        self.groups = {}
+        self.users = {}
+        self.members = {}
+
+    def add_group(self, group_id, name, attributes=None, realm_roles=None):
+        self.groups[group_id] = {
+            "id": group_id,
+            "name": name,
+            "path": f"/{name}",
+            "attributes": attributes or {},
+            "realmRoles": realm_roles or [],
+        }
+        self.members[group_id] = set()
+
+    def add_user(self, user_id, username, groups=()):
+        self.users[user_id] = {"id": user_id, "username": username}
+        for group_id in groups:
+            self.members[group_id].add(user_id)
+
+    def _raw_get(self, path, **params):
+        self.calls["raw_get"] += 1
+        response = Response()
+        # Only `admin/realms/{realm}/roles/{role}/groups` is supported.
+        role = path.split("/")[-2]
+        groups = [
+            self._brief(group)
+            for group in self.groups.values()
+            if role in group["realmRoles"]
+        ]
+
+        if groups:
+            first = params["first"]
+            response.status_code = 200
+            response._content = json.dumps(
+                groups[first : first + params["max"]]
+            ).encode()
+        else:
+            response.status_code = 404
+            response._content = b'{"error": "Could not find role"}'
+
+        return response
+
+    def _brief(self, group):
+        return {k: group[k] for k in ("id", "name", "path")}
+
+    def get_groups(self, query=None):
+        self.calls["get_groups"] += 1
+        query = query or {}
+        groups = list(self.groups.values())
+
+        if search := query.get("search"):
+            if query.get("exact") == "true":
+                groups = [group for group in groups if group["name"] == search]
+            else:
+                groups = [group for group in groups if search in group["name"]]
+
+        first = query.get("first", 0)
+        groups = groups[first : first + query.get("max", len(groups))]
+
+        self.calls["groups_returned"] += len(groups)
+        return [self._brief(group) for group in groups]
+
+    def get_group(self, group_id):
+        self.calls["get_group"] += 1
+        if group_id not in self.groups:
+            raise KeycloakGetError("Could not find group", response_code=404)
+        group = self.groups[group_id]
+        return {**group, "attributes": dict(group["attributes"])}
+
+    def update_group(self, group_id, payload):
+        self.calls["update_group"] += 1
+        self.groups[group_id] = {**self.groups[group_id], **payload}
+
+    def get_user_id(self, username):
+        self.calls["get_user_id"] += 1
+        for user in self.users.values():
+            if user["username"] == username:
+                return user["id"]
+        return None
+
+    def get_users(self, query=None):
+        self.calls["get_users"] += 1
+        username = (query or {}).get("username")
+        return [user for user in self.users.values() if user["username"] == username]
+
+    def get_user_groups(self, user_id):
+        self.calls["get_user_groups"] += 1
+        if user_id not in self.users:
+            raise KeycloakGetError("User not found", response_code=404)
+        return [
+            self._brief(self.groups[group_id])
+            for group_id, members in self.members.items()
+            if user_id in members
+        ]
+
+    def get_group_members(self, group_id, query=None):
+        self.calls["get_group_members"] += 1
+        members = [self.users[user_id] for user_id in sorted(self.members[group_id])]
+        if query:
+            members = members[query["first"] : query["first"] + query["max"]]
+        return members
+
+    def group_user_add(self, user_id, group_id):
+        self.calls["group_user_add"] += 1
+        self.members[group_id].add(user_id)
+
+    def group_user_remove(self, user_id, group_id):
+        self.calls["group_user_remove"] += 1
+        self.members[group_id].discard(user_id)
+
+
+@pytest.fixture
+def mock_keycloak_admin():
+    admin = MockKeycloakAdmin()
+    admin.add_group("team-1", "TEAM-team1")
+    admin.add_group("team-2", "TEAM-team2", realm_roles=["origo-team"])
+    admin.add_group("group-1", "group1")
+    admin.add_user("user-1", "janedoe", groups=["team-1", "group-1"])
+    admin.add_user("user-2", "homersimpson")
+    admin.add_user("user-3", "misty", groups=["team-1"])
+    return admin
+
+
+@pytest.fixture
+def teams_client(monkeypatch, mock_keycloak_admin):
+    monkeypatch.setattr(
+        "dataplatform_keycloak.teams_client.TeamsKeycloakAdmin",
+        lambda **kwargs: mock_keycloak_admin,
+    )
+    return TeamsClient(
+        keycloak_server_url="http://kc.mock.com",
+        keycloak_realm="mock",
+        teams_admin_username="team-admin",
+        teams_admin_password="password",
+    )
@@ -0,0 +1,43 @@
+from freezegun import freeze_time
+
+from dataplatform_keycloak.cache import TTLCache
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(ttl=60)
+
+    with freeze_time("2024-01-01 12:00:00") as frozen_time:
+        cache.set("short", 1, ttl=10)
+        cache.set("default", 2)
+
+        frozen_time.tick(10)
+        assert cache.get("short") is None
+        assert cache.get("default") == 2
+
+        frozen_time.tick(50)
+        assert "default" not in cache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+
+    cache.clear()
+    assert len(cache) == 0
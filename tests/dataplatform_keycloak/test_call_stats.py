@@ -0,0 +1,58 @@
+import requests
+
+from dataplatform_keycloak.call_stats import (
+    call_stats_scope,
+    instrument_requests,
+    timed,
+    url_category,
+)
+from dataplatform_keycloak.concurrency import run_concurrently
+
+KEYCLOAK_URL = "http://kc.mock.com/auth/realms/mock"
+
+
+def test_url_category():
+    assert url_category(f"{KEYCLOAK_URL}/protocol/openid-connect/token") == "token"
+    assert url_category(f"{KEYCLOAK_URL}/protocol/openid-connect/certs") == "jwks"
+    assert url_category(f"{KEYCLOAK_URL}/.well-known/uma2-configuration") == "discovery"
+    assert url_category(f"{KEYCLOAK_URL}/authz/protection/uma-policy/1") == "policy"
+    assert (
+        url_category(f"{KEYCLOAK_URL}/authz/protection/resource_set?name=foo")
+        == "resource_set"
+    )
+    assert url_category("http://kc.mock.com/auth/admin/realms/mock/groups") == "admin"
+    assert url_category("http://example.com/") == "other"
+
+
+def test_timed_outside_scope():
+    with timed("ssm"):
+        pass
+
+
+def test_call_stats_shared_with_workers():
+    def call():
+        with timed("ssm"):
+            pass
+
+    with call_stats_scope() as stats:
+        run_concurrently(call, call, call)
+
+    assert stats.calls == {"ssm": 3}
+    assert stats.server_timing().startswith('ssm;desc="3 calls";dur=')
+
+
+def test_instrument_requests(monkeypatch):
+    def send(adapter, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[]"
+        return response
+
+    monkeypatch.setattr(requests.adapters.HTTPAdapter, "send", send)
+    instrument_requests()
+
+    with call_stats_scope() as stats:
+        requests.get(f"{KEYCLOAK_URL}/authz/protection/uma-policy/")
+        requests.Session().post(f"{KEYCLOAK_URL}/protocol/openid-connect/token")
+
+    assert stats.calls == {"policy": 1, "token": 1}
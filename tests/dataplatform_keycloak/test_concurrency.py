@@ -0,0 +1,44 @@
+import contextvars
+import threading
+
+import pytest
+
+from dataplatform_keycloak.concurrency import map_concurrently, run_concurrently
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_run_concurrently_returns_results_in_order():
+    assert run_concurrently(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+
+def test_run_concurrently_overlaps_calls():
+    # Both calls must be in flight at the same time for the barrier to pass.
+    barrier = threading.Barrier(2, timeout=5)
+    assert run_concurrently(barrier.wait, barrier.wait) is not None
+
+
+def test_run_concurrently_raises_first_exception():
+    def fail(message):
+        raise ValueError(message)
+
+    with pytest.raises(ValueError, match="first"):
+        run_concurrently(lambda: 1, lambda: fail("first"), lambda: fail("second"))
+
+
+def test_run_concurrently_propagates_context():
+    request_id.set("abc")
+    assert run_concurrently(request_id.get, request_id.get) == ["abc", "abc"]
+
+
+def test_map_concurrently_nested():
+    assert map_concurrently(
+        lambda i: map_concurrently(lambda j: i * j, range(3)), range(3)
+    ) == [[0, 0, 0], [0, 1, 2], [0, 2, 4]]
+
+
+def test_map_concurrently_nested_overlaps_calls():
+    barrier = threading.Barrier(4, timeout=5)
+    map_concurrently(
+        lambda i: map_concurrently(lambda j: barrier.wait(), range(2)), range(2)
+    )
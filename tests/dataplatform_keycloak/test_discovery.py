@@ -0,0 +1,121 @@
+import json
+import os
+
+import jwt
+import pytest
+import requests
+
+from dataplatform_keycloak import discovery
+from dataplatform_keycloak.resource_server import ResourceServer
+from dataplatform_keycloak.uma_well_known import get_jwks, get_well_known
+from tests.keycloak_stub import RESOURCE_SERVER_CLIENT_ID, RESOURCE_SERVER_CLIENT_SECRET
+
+
+@pytest.fixture
+def well_known_url(keycloak_stub):
+    return f"{keycloak_stub.realm_url}/.well-known/uma2-configuration"
+
+
+def cache_files():
+    return [
+        name
+        for name in os.listdir(discovery.DISCOVERY_CACHE_DIR)
+        if name.endswith(".json")
+    ]
+
+
+def test_get_well_known_cached_in_memory(keycloak_stub):
+    well_known = get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+
+    assert get_well_known(keycloak_stub.server_url, keycloak_stub.realm) is well_known
+    assert keycloak_stub.calls["well_known"] == 1
+
+
+def test_get_well_known_cached_in_file(keycloak_stub):
+    well_known = get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+    discovery.clear()
+
+    assert get_well_known(keycloak_stub.server_url, keycloak_stub.realm) == well_known
+    assert keycloak_stub.calls["well_known"] == 1
+    assert len(cache_files()) == 1
+
+
+def test_get_document_expired(keycloak_stub, well_known_url):
+    discovery.get_document(well_known_url, dict, ttl=0)
+    discovery.get_document(well_known_url, dict, ttl=0)
+
+    assert keycloak_stub.calls["well_known"] == 2
+
+
+def test_get_document_refresh(keycloak_stub, well_known_url):
+    discovery.get_document(well_known_url, dict)
+    discovery.get_document(well_known_url, dict, refresh=True)
+
+    assert keycloak_stub.calls["well_known"] == 2
+
+
+def test_get_well_known_invalid_cached_file(keycloak_stub, well_known_url):
+    well_known = get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+    discovery.clear()
+
+    # Validation applies to cached documents too.
+    path = os.path.join(discovery.DISCOVERY_CACHE_DIR, cache_files()[0])
+    with open(path) as f:
+        cached = json.load(f)
+    cached["document"]["token_endpoint"] = "https://malicious.org/token"
+    with open(path, "w") as f:
+        json.dump(cached, f)
+
+    assert get_well_known(keycloak_stub.server_url, keycloak_stub.realm) == well_known
+    assert keycloak_stub.calls["well_known"] == 2
+
+
+def test_get_well_known_unreadable_cached_file(keycloak_stub):
+    get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+    discovery.clear()
+
+    path = os.path.join(discovery.DISCOVERY_CACHE_DIR, cache_files()[0])
+    with open(path, "w") as f:
+        f.write('{"url": ')
+
+    get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+    assert keycloak_stub.calls["well_known"] == 2
+
+
+def test_untrusted_cache_dir(keycloak_stub):
+    os.makedirs(discovery.DISCOVERY_CACHE_DIR)
+    os.chmod(discovery.DISCOVERY_CACHE_DIR, 0o777)
+
+    get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+
+    assert cache_files() == []
+
+
+def test_memory_only(keycloak_stub, monkeypatch):
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_DIR", "")
+
+    get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+    get_well_known(keycloak_stub.server_url, keycloak_stub.realm)
+
+    assert keycloak_stub.calls["well_known"] == 1
+
+
+def test_decode_jwt_rotated_keys(keycloak_stub):
+    resource_server = ResourceServer(
+        client_secret_key=RESOURCE_SERVER_CLIENT_SECRET,
+        keycloak_server_url=keycloak_stub.server_url,
+        keycloak_realm=keycloak_stub.realm,
+        resource_server_client_id=RESOURCE_SERVER_CLIENT_ID,
+    )
+    jwks_uri = resource_server.uma_well_known.jwks_uri
+    jwks = requests.get(jwks_uri).json()
+    for key in jwks["keys"]:
+        key["kid"] = "rotated-away"
+    discovery._documents.set(jwks_uri, jwt.PyJWKSet.from_dict(jwks))
+    keycloak_stub.calls.clear()
+
+    token = resource_server.resource_server_access_token()
+    resource_server._decode_jwt(token, "account")
+    resource_server._decode_jwt(token, "account")
+    assert keycloak_stub.calls["jwks"] == 1
+    assert get_jwks(jwks_uri)[jwt.get_unverified_header(token)["kid"]]
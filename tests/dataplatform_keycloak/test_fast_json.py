@@ -0,0 +1,49 @@
+import pytest
+from fastapi.responses import JSONResponse
+
+from dataplatform_keycloak import fast_json
+from resources.responses import FastJSONResponse
+
+CONTENT = [
+    {
+        "resource_name": "okdata:dataset:blåbær",
+        "scope": "okdata:dataset:read",
+        "teams": ["team0"],
+        "users": [],
+        "count": 3,
+        "share": 0.5,
+        "enabled": True,
+        "parent": None,
+    }
+]
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson isn't installed")
+    return request.param
+
+
+def test_dumps(backend):
+    assert fast_json.dumps(CONTENT) == JSONResponse(CONTENT).body
+
+
+def test_fast_json_response(backend):
+    response = FastJSONResponse(CONTENT, status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.body == JSONResponse(CONTENT).body
+
+
+def test_loads(backend):
+    data = JSONResponse(CONTENT).body
+    assert fast_json.loads(data) == CONTENT
+    assert fast_json.loads(data.decode()) == CONTENT
+
+
+def test_loads_invalid(backend):
+    with pytest.raises(ValueError):
+        fast_json.loads(b"[{")
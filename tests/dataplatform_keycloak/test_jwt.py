@@ -1,7 +1,14 @@
 import jwt
+import pytest
 from freezegun import freeze_time
 
-from dataplatform_keycloak.jwt import generate_jwt
+from dataplatform_keycloak import jwt as dataplatform_jwt
+from dataplatform_keycloak.jwt import cached_jwt, generate_jwt
+
+
+@pytest.fixture(autouse=True)
+def reset_cached_jwt(monkeypatch):
+    monkeypatch.setattr(dataplatform_jwt, "_cached_jwt", None)
 
 
 @freeze_time("1970-01-01")
@@ -12,3 +19,24 @@ def test_generate_jwt():
     assert claims["iat"] == 0
     assert claims["exp"] == 120
     assert claims["iss"] == "jwt-issuer"
+
+
+def test_cached_jwt_reused_until_renewal_margin():
+    with freeze_time("1970-01-01 00:00:00") as frozen_time:
+        token = cached_jwt()
+
+        frozen_time.tick(99)
+        assert cached_jwt() == token
+
+        frozen_time.tick(1)
+        renewed_token = cached_jwt()
+
+    assert renewed_token != token
+    claims = jwt.decode(
+        renewed_token,
+        "jwt-secret",
+        algorithms=["HS256"],
+        options={"verify_exp": False},
+    )
+    assert claims["iat"] == 100
+    assert claims["exp"] == 220
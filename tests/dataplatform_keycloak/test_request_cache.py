@@ -0,0 +1,43 @@
+from dataplatform_keycloak.concurrency import run_concurrently
+from dataplatform_keycloak.request_cache import invalidate, memoized, request_scope
+
+
+def test_memoized_outside_request_scope():
+    calls = []
+    memoized(("thing", 1), lambda: calls.append(1))
+    memoized(("thing", 1), lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+
+def test_memoized_returns_copies():
+    with request_scope() as cache:
+        memoized(("thing", 1), lambda: {"tags": ["a"]})["tags"].append("b")
+
+        assert memoized(("thing", 1), lambda: None) == {"tags": ["a"]}
+        assert cache.hits == 1
+
+
+def test_memoized_shared_with_workers():
+    with request_scope() as cache:
+        run_concurrently(
+            lambda: memoized(("thing", 1), lambda: 1),
+            lambda: memoized(("thing", 2), lambda: 2),
+        )
+
+        assert memoized(("thing", 1), lambda: None) == 1
+        assert memoized(("thing", 2), lambda: None) == 2
+        assert cache.hits == 2
+
+
+def test_invalidate():
+    with request_scope():
+        memoized(("thing", 1, "a"), lambda: 1)
+        memoized(("thing", 1, "b"), lambda: 1)
+        memoized(("thing", 2), lambda: 2)
+
+        invalidate("thing", 1)
+
+        assert memoized(("thing", 1, "a"), lambda: None) is None
+        assert memoized(("thing", 1, "b"), lambda: None) is None
+        assert memoized(("thing", 2), lambda: None) == 2
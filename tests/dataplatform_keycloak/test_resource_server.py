@@ -0,0 +1,67 @@
+from freezegun import freeze_time
+
+from tests.keycloak_stub import TOKEN_LIFETIME
+
+DATASET = "okdata:dataset:my-dataset"
+
+
+def test_access_token_reused(keycloak_stub, stub_resource_server):
+    token = stub_resource_server.resource_server_access_token()
+
+    assert stub_resource_server.resource_server_access_token() == token
+    assert keycloak_stub.calls["token"] == 1
+
+
+def test_access_token_expired(keycloak_stub, stub_resource_server):
+    resource_id = keycloak_stub.add_resource(DATASET, "okdata:dataset", [])
+
+    with freeze_time() as frozen_time:
+        assert stub_resource_server.get_resource_id(DATASET) == resource_id
+
+        # Like a shared server left idle past the token's lifetime.
+        frozen_time.tick(TOKEN_LIFETIME + 100)
+        assert stub_resource_server.get_resource_id(DATASET) == resource_id
+        assert keycloak_stub.calls["token"] == 2
+
+
+def test_access_token_about_to_expire(keycloak_stub, stub_resource_server):
+    with freeze_time() as frozen_time:
+        token = stub_resource_server.resource_server_access_token()
+
+        frozen_time.tick(TOKEN_LIFETIME - 5)
+        assert stub_resource_server.resource_server_access_token() != token
+        assert keycloak_stub.calls["token"] == 2
+
+
+def test_warm_up_renews_access_token(keycloak_stub, stub_resource_server):
+    with freeze_time() as frozen_time:
+        stub_resource_server.warm_up()
+        assert keycloak_stub.calls["token"] == 1
+        assert keycloak_stub.calls["jwks"] == 1
+
+        # Renewed ahead of the next warm event, though still valid for now.
+        frozen_time.tick(60)
+        token = stub_resource_server.resource_server_access_token()
+        stub_resource_server.warm_up(min_validity=TOKEN_LIFETIME)
+        assert stub_resource_server.resource_server_access_token() != token
+        assert keycloak_stub.calls["token"] == 2
+        assert keycloak_stub.calls["jwks"] == 1
+
+
+def test_app_with_expired_access_token(keycloak_stub, stub_client):
+    keycloak_stub.add_user("janedoe")
+    keycloak_stub.grant_scope("keycloak:resource:admin", "janedoe")
+
+    with freeze_time() as frozen_time:
+        for i in range(2):
+            headers = {"Authorization": f"Bearer {keycloak_stub.token_for('janedoe')}"}
+            response = stub_client.post(
+                "/permissions",
+                headers=headers,
+                json={
+                    "owner": {"user_id": "janedoe", "user_type": "user"},
+                    "resource_name": f"{DATASET}-{i}",
+                },
+            )
+            assert response.status_code == 201, response.text
+            frozen_time.tick(TOKEN_LIFETIME + 100)
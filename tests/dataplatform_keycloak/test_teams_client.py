@@ -0,0 +1,245 @@
+import pytest
+from freezegun import freeze_time
+
+from dataplatform_keycloak.concurrency import MAX_WORKERS
+from dataplatform_keycloak.exceptions import TeamNotFoundError, UserNotFoundError
+from dataplatform_keycloak.request_cache import request_scope
+
+
+def test_list_teams_cached(teams_client, mock_keycloak_admin):
+    with freeze_time("2024-01-01 12:00:00") as frozen_time:
+        teams = teams_client.list_teams()
+        assert {team["name"] for team in teams} == {"TEAM-team1", "TEAM-team2"}
+
+        teams_client.list_teams()
+        assert mock_keycloak_admin.calls["get_groups"] == 1
+
+        frozen_time.tick(teams_client.TEAM_CATALOGUE_TTL)
+        teams_client.list_teams()
+        assert mock_keycloak_admin.calls["get_groups"] == 2
+
+
+def test_list_teams_returns_copies(teams_client):
+    teams_client.list_teams()[0]["is_member"] = True
+    assert "is_member" not in teams_client.list_teams()[0]
+
+
+def test_get_teams(teams_client, mock_keycloak_admin):
+    teams, not_found = teams_client.get_teams(
+        ["team-2", "group-1", "unknown", "team-1", "team-2"]
+    )
+
+    assert [team["id"] for team in teams] == ["team-2", "team-1"]
+    assert not_found == ["group-1", "unknown"]
+    assert mock_keycloak_admin.calls["get_group"] == 4
+
+
+def test_get_team_by_name(teams_client, mock_keycloak_admin):
+    for i in range(1000):
+        mock_keycloak_admin.add_group(f"group-{i}", f"other-group-{i}")
+
+    assert teams_client.get_team_by_name("team1")["id"] == "team-1"
+    assert mock_keycloak_admin.calls["get_groups"] == 1
+    assert mock_keycloak_admin.calls["groups_returned"] == 1
+
+
+def test_get_team_by_name_from_catalogue(teams_client, mock_keycloak_admin):
+    teams_client.list_teams()
+    assert teams_client.get_team_by_name("team1")["id"] == "team-1"
+    assert teams_client.get_team_by_name("team2")["id"] == "team-2"
+    assert mock_keycloak_admin.calls["get_groups"] == 1
+
+
+def test_get_team_by_name_not_found(teams_client):
+    with pytest.raises(TeamNotFoundError):
+        teams_client.get_team_by_name("group1")
+    with pytest.raises(TeamNotFoundError):
+        teams_client.get_team_by_name("team1", realm_role="origo-team")
+
+
+def test_update_team_invalidates_catalogue(teams_client):
+    teams_client.list_teams()
+    teams_client.update_team("team-1", "renamed", None)
+
+    assert teams_client.get_team_by_name("renamed")["id"] == "team-1"
+    with pytest.raises(TeamNotFoundError):
+        teams_client.get_team_by_name("team1")
+
+
+def test_get_team_by_name_renamed_elsewhere(teams_client, mock_keycloak_admin):
+    teams_client.list_teams()
+    # Renamed by another container, leaving this one's catalogue stale.
+    mock_keycloak_admin.update_group("team-1", {"name": "TEAM-renamed"})
+
+    with pytest.raises(TeamNotFoundError):
+        teams_client.get_team_by_name("team1")
+    assert mock_keycloak_admin.calls["get_groups"] == 2
+
+    assert teams_client.get_team_by_name("renamed")["id"] == "team-1"
+
+
+def test_get_team_members_page(teams_client, mock_keycloak_admin):
+    members = teams_client.get_team_members("team-1", first=1, max_results=5)
+
+    assert [member["username"] for member in members] == ["misty"]
+    assert mock_keycloak_admin.calls["get_group_members"] == 1
+
+
+def test_update_team_in_request_scope(teams_client, mock_keycloak_admin):
+    with request_scope():
+        teams_client.get_team("team-1")
+        teams_client.update_team("team-1", "renamed", None)
+
+        assert teams_client.get_team("team-1")["name"] == "TEAM-renamed"
+        assert mock_keycloak_admin.calls["get_group"] == 2
+
+
+def test_update_members_in_request_scope(teams_client, mock_keycloak_admin):
+    with request_scope():
+        teams_client.get_team("team-1")
+        teams_client.update_members("team-1", ["homersimpson"])
+
+        members = teams_client.get_team_members("team-1")
+        assert [member["username"] for member in members] == ["homersimpson"]
+        assert mock_keycloak_admin.calls["get_group"] == 1
+        assert mock_keycloak_admin.calls["get_group_members"] == 2
+
+
+def test_update_members(teams_client, mock_keycloak_admin):
+    members = teams_client.update_members("team-1", ["janedoe", "homersimpson"])
+
+    assert [member["username"] for member in members] == ["homersimpson", "janedoe"]
+    assert mock_keycloak_admin.members["team-1"] == {"user-1", "user-2"}
+    assert mock_keycloak_admin.calls["get_users"] == 2
+    assert mock_keycloak_admin.calls["get_group"] == 1
+    assert mock_keycloak_admin.calls["get_group_members"] == 1
+    assert mock_keycloak_admin.calls["group_user_add"] == 1
+    assert mock_keycloak_admin.calls["group_user_remove"] == 1
+
+
+def test_update_members_caches_users(teams_client, mock_keycloak_admin):
+    teams_client.update_members("team-1", ["janedoe", "homersimpson"])
+    teams_client.update_members("team-1", ["JaneDoe"])
+
+    assert mock_keycloak_admin.members["team-1"] == {"user-1"}
+    assert mock_keycloak_admin.calls["get_users"] == 2
+
+
+def test_update_members_unknown_user(teams_client, mock_keycloak_admin):
+    with pytest.raises(UserNotFoundError):
+        teams_client.update_members("team-1", ["janedoe", "nobody"])
+
+    assert mock_keycloak_admin.members["team-1"] == {"user-1", "user-3"}
+
+
+def test_list_user_teams_caches_user_id(teams_client, mock_keycloak_admin):
+    assert [team["id"] for team in teams_client.list_user_teams("janedoe")] == [
+        "team-1"
+    ]
+    teams_client.list_user_teams("janedoe", cached=False)
+
+    assert mock_keycloak_admin.calls["get_users"] == 1
+    assert mock_keycloak_admin.calls["get_user_groups"] == 2
+
+
+def test_list_user_teams_deleted_user(teams_client, mock_keycloak_admin):
+    teams_client.list_user_teams("janedoe")
+    del mock_keycloak_admin.users["user-1"]
+
+    assert teams_client.list_user_teams("janedoe", cached=False) == []
+    assert teams_client.get_user_id("janedoe") is None
+
+
+def test_get_user_id_unknown_user_cached(teams_client, mock_keycloak_admin):
+    with freeze_time("2024-01-01 12:00:00") as frozen_time:
+        assert teams_client.get_user_id("nobody") is None
+        assert teams_client.get_user_id("nobody") is None
+        assert mock_keycloak_admin.calls["get_users"] == 1
+
+        mock_keycloak_admin.add_user("user-4", "nobody")
+        frozen_time.tick(teams_client.UNKNOWN_USER_CACHE_TTL)
+        assert teams_client.get_user_id("nobody") == "user-4"
+
+
+def test_get_user_by_username(teams_client, mock_keycloak_admin):
+    assert teams_client.get_user_by_username("homersimpson")["id"] == "user-2"
+    assert teams_client.get_user_id("homersimpson") == "user-2"
+    assert mock_keycloak_admin.calls["get_users"] == 1
+
+    with pytest.raises(UserNotFoundError):
+        teams_client.get_user_by_username("nobody")
+
+
+def test_get_users_by_username(teams_client, mock_keycloak_admin):
+    teams_client.get_user_id("janedoe")
+    users, not_found = teams_client.get_users_by_username(
+        ["JaneDoe", "misty", "nobody", "misty"]
+    )
+
+    assert {username: user["id"] for username, user in users.items()} == {
+        "JaneDoe": "user-1",
+        "misty": "user-3",
+    }
+    assert not_found == ["nobody"]
+    assert mock_keycloak_admin.calls["get_users"] == 3
+
+
+def test_user_team_ids_cached(teams_client, mock_keycloak_admin):
+    with freeze_time("2024-01-01 12:00:00") as frozen_time:
+        assert teams_client.user_team_ids("janedoe") == {"team-1"}
+        assert teams_client.user_team_ids("JaneDoe") == {"team-1"}
+        assert mock_keycloak_admin.calls["get_user_groups"] == 1
+
+        assert teams_client.user_team_ids("janedoe", cached=False) == {"team-1"}
+        assert mock_keycloak_admin.calls["get_user_groups"] == 2
+
+        frozen_time.tick(teams_client.USER_TEAMS_CACHE_TTL)
+        teams_client.user_team_ids("janedoe")
+        assert mock_keycloak_admin.calls["get_user_groups"] == 3
+
+
+def test_update_members_invalidates_user_teams(teams_client):
+    assert teams_client.user_team_ids("janedoe") == {"team-1"}
+    assert teams_client.user_team_ids("homersimpson") == set()
+    assert teams_client.user_team_ids("misty") == {"team-1"}
+
+    teams_client.update_members("team-1", ["homersimpson", "misty"])
+
+    assert teams_client.user_team_ids("janedoe") == set()
+    assert teams_client.user_team_ids("homersimpson") == {"team-1"}
+    assert teams_client.user_team_ids("misty") == {"team-1"}
+
+
+def test_list_teams_with_realm_role(teams_client, mock_keycloak_admin):
+    assert [team["id"] for team in teams_client.list_teams("origo-team")] == ["team-2"]
+    assert teams_client.list_teams("unknown-role") == []
+
+    teams_client.list_teams("origo-team")
+    assert mock_keycloak_admin.calls["raw_get"] == 2
+
+
+def test_list_teams_with_realm_role_paginated(teams_client, mock_keycloak_admin):
+    teams_client.MAX_ITEMS_PER_PAGE = 10
+    for i in range(24):
+        mock_keycloak_admin.add_group(f"t-{i}", f"TEAM-t{i}", realm_roles=["role"])
+
+    teams = teams_client.list_teams("role")
+
+    assert [team["id"] for team in teams] == [f"t-{i}" for i in range(24)]
+    # The first page alone, then a batch of pages until a short one is seen.
+    assert mock_keycloak_admin.calls["raw_get"] == 1 + MAX_WORKERS
+
+
+def test_warm_up(keycloak_stub, stub_teams_client):
+    keycloak_stub.add_group("TEAM-team1")
+
+    with freeze_time() as frozen_time:
+        stub_teams_client.warm_up(min_validity=60)
+        token_calls = keycloak_stub.calls["token"]
+        assert keycloak_stub.calls["groups"] == 1
+
+        # Still valid, but not for long enough.
+        frozen_time.tick(120)
+        stub_teams_client.warm_up(min_validity=300)
+        assert keycloak_stub.calls["token"] == token_calls + 1
+        assert keycloak_stub.calls["groups"] == 2
@@ -1,4 +1,9 @@
-from dataplatform_keycloak.teams_client import TeamsClient
+import time
+
+import jwt as jwt_lib
+from freezegun import freeze_time
+
+from dataplatform_keycloak.teams_client import TeamsClient, TeamsKeycloakConnection
 
 
 def test_teams_client_no_connection_proxy():
@@ -11,7 +16,7 @@ def test_teams_client_with_connection_proxy(monkeypatch):
     jwt = "foobar"
     keycloak_proxy_url = "http://kc.mock-kong.com"
 
-    monkeypatch.setattr("dataplatform_keycloak.teams_client.generate_jwt", lambda: jwt)
+    monkeypatch.setattr("dataplatform_keycloak.teams_client.cached_jwt", lambda: jwt)
 
     teams_client = TeamsClient(keycloak_admin_api_url=keycloak_proxy_url)
     admin_client = teams_client.teams_admin_client
@@ -22,3 +27,91 @@ def test_teams_client_with_connection_proxy(monkeypatch):
         admin_client.connection.headers["Keycloak-Authorization"]
         == f"Bearer {admin_client.connection.token['access_token']}"
     )
+
+
+def test_teams_keycloak_connection_rotates_jwt(monkeypatch):
+    jwts = iter(["jwt-1", "jwt-2"])
+    monkeypatch.setattr(
+        "dataplatform_keycloak.teams_client.cached_jwt", lambda: next(jwts)
+    )
+
+    connection = TeamsKeycloakConnection(
+        server_url="http://kc.mock.com/auth/",
+        admin_api_server_url="http://kc.mock-kong.com",
+        realm_name="mock",
+        token={"access_token": "kc-token", "expires_in": 300},
+    )
+    assert connection.headers["Authorization"] == "Bearer jwt-1"
+
+    connection._refresh_if_required()
+    assert connection.headers["Authorization"] == "Bearer jwt-2"
+    assert connection.headers["Keycloak-Authorization"] == "Bearer kc-token"
+
+
+class MockKeycloakOpenID:
+    def __init__(self):
+        self.logins = 0
+        self.refreshes = 0
+
+    def token(self, username, password, **kwargs):
+        self.logins += 1
+        return _token(f"login-{self.logins}")
+
+    def refresh_token(self, refresh_token):
+        self.refreshes += 1
+        return _token(f"refresh-{self.refreshes}")
+
+
+def _token(access_token, refresh_expires_in=1800):
+    return {
+        "access_token": access_token,
+        "expires_in": 300,
+        "refresh_token": jwt_lib.encode(
+            {"exp": int(time.time()) + refresh_expires_in}, "key", algorithm="HS256"
+        ),
+    }
+
+
+def _connection(monkeypatch, token):
+    monkeypatch.setattr(
+        "dataplatform_keycloak.teams_client.cached_jwt", lambda: "kong-jwt"
+    )
+    connection = TeamsKeycloakConnection(
+        server_url="http://kc.mock.com/auth/",
+        admin_api_server_url="http://kc.mock-kong.com",
+        realm_name="mock",
+        username="admin",
+        password="password",
+        token=token,
+    )
+    connection._keycloak_openid = MockKeycloakOpenID()
+    return connection
+
+
+def test_teams_keycloak_connection_refreshes_token(monkeypatch):
+    with freeze_time("2024-01-01 12:00:00") as frozen_time:
+        connection = _connection(monkeypatch, _token("initial"))
+
+        connection._refresh_if_required()
+        assert connection.keycloak_openid.refreshes == 0
+
+        frozen_time.tick(300)
+        connection._refresh_if_required()
+
+    assert connection.keycloak_openid.refreshes == 1
+    assert connection.keycloak_openid.logins == 0
+    assert connection.headers["Keycloak-Authorization"] == "Bearer refresh-1"
+    assert connection.headers["Authorization"] == "Bearer kong-jwt"
+
+
+def test_teams_keycloak_connection_logs_in_when_refresh_token_expired(monkeypatch):
+    with freeze_time("2024-01-01 12:00:00") as frozen_time:
+        connection = _connection(monkeypatch, _token("initial", refresh_expires_in=200))
+
+        frozen_time.tick(300)
+        connection._refresh_if_required()
+
+    assert connection.keycloak_openid.refreshes == 0
+    assert connection.keycloak_openid.logins == 1
+    assert connection.headers["Keycloak-Authorization"] == "Bearer login-1"
+    assert connection.headers["Authorization"] == "Bearer kong-jwt"
@@ -0,0 +1,20 @@
+from jobs import tracing
+
+
+def test_capture(monkeypatch, mocker):
+    monkeypatch.setattr(tracing, "_patched", False)
+    patch_all = mocker.patch("aws_xray_sdk.core.patch_all")
+    recorder_capture = mocker.patch("aws_xray_sdk.core.xray_recorder.capture")
+    recorder_capture.return_value = lambda f: f
+
+    @tracing.capture("job")
+    def job(event, context):
+        return event
+
+    patch_all.assert_not_called()
+
+    assert job("event", None) == "event"
+    assert job("event", None) == "event"
+
+    patch_all.assert_called_once()
+    recorder_capture.assert_called_with("job")
@@ -0,0 +1,773 @@
+"""An in-memory stand-in for the parts of Keycloak used by this service.
+
+`KeycloakStub` answers HTTP requests sent through `requests` (which is what
+`ResourceServer`, python-keycloak and okdata-resource-auth all use) and JWKS
+fetches by `jwt.PyJWKClient` for its `server_url`, so the app can be tested and benchmarked without a Keycloak
+server or network access:
+
+    stub = KeycloakStub(latency={"uma_policy": 0.02})
+    os.environ.update(stub.environ())
+    stub.add_user("janedoe", groups=[stub.add_group("TEAM-team1")])
+
+    with stub:
+        ...
+
+Every request is counted in `calls`, keyed by endpoint name (see `ROUTES`).
+Latency is injected per endpoint name, with `"default"` applying to the rest.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+import jwt
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+CLIENT_ID = "okdata-permission-api"
+CLIENT_SECRET = "client-secret"
+RESOURCE_SERVER_CLIENT_ID = "okdata-resource-server"
+RESOURCE_SERVER_CLIENT_SECRET = "resource-server-secret"
+TEAM_ADMIN_USERNAME = "team-admin"
+TEAM_ADMIN_PASSWORD = "team-admin-password"
+
+TOKEN_LIFETIME = 300
+UMA_TICKET_GRANT = "urn:ietf:params:oauth:grant-type:uma-ticket"
+
+# (method, path pattern relative to `/auth/`, endpoint name). Requests are
+# handled by the method named `_<method>_<endpoint name>`.
+ROUTES = [
+    ("GET", r"realms/{realm}/\.well-known/uma2-configuration", "well_known"),
+    ("POST", r"realms/{realm}/protocol/openid-connect/token", "token"),
+    ("POST", r"realms/{realm}/protocol/openid-connect/token/introspect", "introspect"),
+    ("GET", r"realms/{realm}/protocol/openid-connect/certs", "jwks"),
+    ("GET", r"realms/{realm}/authz/protection/resource_set", "resource_set"),
+    ("POST", r"realms/{realm}/authz/protection/resource_set", "resource_set"),
+    ("GET", r"realms/{realm}/authz/protection/resource_set/(?P<id>[^/]+)", "resource"),
+    (
+        "DELETE",
+        r"realms/{realm}/authz/protection/resource_set/(?P<id>[^/]+)",
+        "resource",
+    ),
+    ("GET", r"realms/{realm}/authz/protection/uma-policy/?", "uma_policy"),
+    ("POST", r"realms/{realm}/authz/protection/uma-policy/(?P<id>[^/]+)", "uma_policy"),
+    ("PUT", r"realms/{realm}/authz/protection/uma-policy/(?P<id>[^/]+)", "uma_policy"),
+    (
+        "DELETE",
+        r"realms/{realm}/authz/protection/uma-policy/(?P<id>[^/]+)",
+        "uma_policy",
+    ),
+    ("GET", r"admin/realms/{realm}/groups", "groups"),
+    ("GET", r"admin/realms/{realm}/groups/(?P<id>[^/]+)", "group"),
+    ("PUT", r"admin/realms/{realm}/groups/(?P<id>[^/]+)", "group"),
+    ("GET", r"admin/realms/{realm}/groups/(?P<id>[^/]+)/members", "group_members"),
+    ("GET", r"admin/realms/{realm}/users", "users"),
+    ("GET", r"admin/realms/{realm}/users/(?P<id>[^/]+)/groups", "user_groups"),
+    (
+        "PUT",
+        r"admin/realms/{realm}/users/(?P<id>[^/]+)/groups/(?P<group_id>[^/]+)",
+        "user_groups",
+    ),
+    (
+        "DELETE",
+        r"admin/realms/{realm}/users/(?P<id>[^/]+)/groups/(?P<group_id>[^/]+)",
+        "user_groups",
+    ),
+    ("GET", r"admin/realms/{realm}/roles/(?P<role>[^/]+)/groups", "role_groups"),
+]
+
+
+class StubError(Exception):
+    def __init__(self, status_code, error, description=None):
+        self.status_code = status_code
+        self.body = {"error": error}
+        if description:
+            self.body["error_description"] = description
+
+
+class KeycloakStub:
+    """Realm data, tokens and endpoint handlers for one Keycloak realm."""
+
+    def __init__(self, server_url="http://keycloak.stub", realm="stub", latency=None):
+        self.server_url = server_url
+        self.realm = realm
+        self.latency = latency or {}
+        self.calls = Counter()
+
+        self.clients = {}
+        self.users = {}
+        self.passwords = {}
+        self.groups = {}
+        self.members = {}
+        self.resources = {}
+        self.policies = {}
+        self.scope_grants = {}
+
+        self._lock = threading.RLock()
+        self._original_send = None
+        self._original_fetch_data = None
+        self._routes = [
+            (method, re.compile(pattern.format(realm=re.escape(realm)) + "$"), name)
+            for method, pattern, name in ROUTES
+        ]
+
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._kid = uuid.uuid4().hex
+
+        self.add_client(CLIENT_ID, CLIENT_SECRET)
+        self.add_client(RESOURCE_SERVER_CLIENT_ID, RESOURCE_SERVER_CLIENT_SECRET)
+        # The public client used by python-keycloak's admin API login.
+        self.add_client("admin-cli", None)
+        self.add_user(TEAM_ADMIN_USERNAME, password=TEAM_ADMIN_PASSWORD)
+
+    @property
+    def realm_url(self):
+        return f"{self.server_url}/auth/realms/{self.realm}"
+
+    def environ(self):
+        """Return the environment variables that point the app to the stub."""
+        return {
+            "KEYCLOAK_SERVER": self.server_url,
+            "KEYCLOAK_REALM": self.realm,
+            "CLIENT_ID": CLIENT_ID,
+            "CLIENT_SECRET": CLIENT_SECRET,
+            "RESOURCE_SERVER_CLIENT_ID": RESOURCE_SERVER_CLIENT_ID,
+            "RESOURCE_SERVER_CLIENT_SECRET": RESOURCE_SERVER_CLIENT_SECRET,
+            "KEYCLOAK_TEAM_ADMIN_USERNAME": TEAM_ADMIN_USERNAME,
+            "KEYCLOAK_TEAM_ADMIN_PASSWORD": TEAM_ADMIN_PASSWORD,
+        }
+
+    # Realm data
+
+    def add_client(self, client_id, secret):
+        """Add a client. Public clients have no `secret`."""
+        self.clients[client_id] = secret
+
+    def add_user(self, username, password="password", groups=(), **attributes):
+        """Add a user that's a member of the groups with IDs in `groups`.
+
+        Extra `attributes` (like `firstName` or `email`) are included in the
+        user representation. Return the new user's ID.
+        """
+        user_id = str(uuid.uuid4())
+        self.users[user_id] = {
+            "id": user_id,
+            "username": username.lower(),
+            "enabled": True,
+            **attributes,
+        }
+        self.passwords[username.lower()] = password
+        for group_id in groups:
+            self.members[group_id].add(user_id)
+        return user_id
+
+    def add_group(self, name, attributes=None, realm_roles=()):
+        """Add a top level group and return its ID."""
+        group_id = str(uuid.uuid4())
+        self.groups[group_id] = {
+            "id": group_id,
+            "name": name,
+            "path": f"/{name}",
+            "attributes": attributes or {},
+            "realmRoles": list(realm_roles),
+            "subGroups": [],
+        }
+        self.members[group_id] = set()
+        return group_id
+
+    def add_resource(self, name, resource_type, scopes):
+        """Add a resource to the resource server and return its ID."""
+        resource_id = str(uuid.uuid4())
+        self.resources[resource_id] = {
+            "_id": resource_id,
+            "name": name,
+            "type": resource_type,
+            "owner": {"id": RESOURCE_SERVER_CLIENT_ID},
+            "ownerManagedAccess": True,
+            "scopes": [{"name": scope} for scope in scopes],
+        }
+        return resource_id
+
+    def add_permission(
+        self, name, resource_id, scopes, users=(), groups=(), clients=()
+    ):
+        """Add a UMA permission to a resource and return its ID.
+
+        `groups` are group names or paths.
+        """
+        return self._create_policy(
+            resource_id,
+            {
+                "name": name,
+                "description": name,
+                "scopes": list(scopes),
+                "users": list(users),
+                "groups": list(groups),
+                "clients": list(clients),
+            },
+        )["id"]
+
+    def grant_scope(self, scope, username):
+        """Give `username` `scope` on the resource server itself.
+
+        This stands in for the resource server's own (non-UMA) policies, like
+        the ones granting `keycloak:resource:admin`.
+        """
+        self.scope_grants.setdefault(scope, set()).add(username)
+
+    def token_for(self, username):
+        """Return an access token for `username`, as if they logged in."""
+        return self._user_tokens(self._user_by_username(username), CLIENT_ID)[
+            "access_token"
+        ]
+
+    # Interception
+
+    def install(self):
+        """Route requests for `server_url` to the stub."""
+        self._original_send = requests.adapters.HTTPAdapter.send
+        self._original_fetch_data = jwt.PyJWKClient.fetch_data
+        stub = self
+
+        def send(adapter, request, **kwargs):
+            if request.url.startswith(f"{stub.server_url}/"):
+                return stub.handle(request)
+            return stub._original_send(adapter, request, **kwargs)
+
+        def fetch_data(jwks_client):
+            if not jwks_client.uri.startswith(f"{stub.server_url}/"):
+                return stub._original_fetch_data(jwks_client)
+
+            request = requests.Request("GET", jwks_client.uri).prepare()
+            jwk_set = stub.handle(request).json()
+            if jwks_client.jwk_set_cache is not None:
+                jwks_client.jwk_set_cache.put(jwk_set)
+            return jwk_set
+
+        requests.adapters.HTTPAdapter.send = send
+        jwt.PyJWKClient.fetch_data = fetch_data
+
+    def uninstall(self):
+        requests.adapters.HTTPAdapter.send = self._original_send
+        jwt.PyJWKClient.fetch_data = self._original_fetch_data
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def handle(self, request):
+        """Return a `requests.Response` for the prepared `request`."""
+        url = urlsplit(request.url)
+        path = url.path.removeprefix("/auth/")
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        for method, pattern, name in self._routes:
+            if method == request.method and (match := pattern.match(path)):
+                break
+        else:
+            return self._response(request, 404, {"error": "Not found"})
+
+        self.calls[name] += 1
+        latency = self.latency.get(name, self.latency.get("default", 0))
+        if latency:
+            time.sleep(latency)
+
+        handler = getattr(self, f"_{request.method.lower()}_{name}")
+        try:
+            with self._lock:
+                status_code, body = handler(request, query, **match.groupdict())
+        except StubError as e:
+            status_code, body = e.status_code, e.body
+
+        return self._response(request, status_code, body)
+
+    def _response(self, request, status_code, body):
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = request.url
+        response.request = request
+        response.reason = "Stubbed"
+        response.headers["Content-Type"] = "application/json"
+        response._content = b"" if body is None else json.dumps(body).encode()
+        return response
+
+    # Tokens
+
+    def _sign(self, claims):
+        now = int(time.time())
+        return jwt.encode(
+            {
+                "iat": now,
+                "exp": now + TOKEN_LIFETIME,
+                "iss": self.realm_url,
+                "jti": uuid.uuid4().hex,
+                "typ": "Bearer",
+                **claims,
+            },
+            self._key,
+            algorithm="RS256",
+            headers={"kid": self._kid},
+        )
+
+    def _verify(self, token, audience=None):
+        try:
+            return jwt.decode(
+                token,
+                self._key.public_key(),
+                algorithms=["RS256"],
+                audience=audience,
+                options={"verify_aud": audience is not None},
+            )
+        except jwt.InvalidTokenError:
+            return None
+
+    def _bearer_claims(self, request):
+        authorization = request.headers.get("Authorization", "")
+        claims = self._verify(authorization.removeprefix("Bearer "))
+        if not claims:
+            raise StubError(401, "invalid_token")
+        return claims
+
+    def _token_response(self, access_token, claims):
+        return {
+            "access_token": access_token,
+            "expires_in": TOKEN_LIFETIME,
+            "refresh_token": self._sign({**claims, "typ": "Refresh"}),
+            "refresh_expires_in": TOKEN_LIFETIME,
+            "token_type": "Bearer",
+        }
+
+    def _user_tokens(self, user, client_id):
+        claims = {
+            "aud": ["account"],
+            "sub": user["id"],
+            "azp": client_id,
+            "preferred_username": user["username"],
+        }
+        return self._token_response(self._sign(claims), claims)
+
+    def _authenticate_client(self, form):
+        client_id = form.get("client_id")
+        if client_id not in self.clients:
+            raise StubError(401, "invalid_client")
+        secret = self.clients[client_id]
+        if secret and form.get("client_secret") != secret:
+            raise StubError(401, "unauthorized_client")
+        return client_id
+
+    def _user_by_username(self, username):
+        for user in self.users.values():
+            if user["username"] == username.lower():
+                return user
+        return None
+
+    # Endpoints
+
+    def _get_well_known(self, request, query):
+        return 200, {
+            "issuer": self.realm_url,
+            "token_endpoint": f"{self.realm_url}/protocol/openid-connect/token",
+            "jwks_uri": f"{self.realm_url}/protocol/openid-connect/certs",
+            "resource_registration_endpoint": (
+                f"{self.realm_url}/authz/protection/resource_set"
+            ),
+            "policy_endpoint": f"{self.realm_url}/authz/protection/uma-policy",
+        }
+
+    def _get_jwks(self, request, query):
+        key = RSAAlgorithm.to_jwk(self._key.public_key(), as_dict=True)
+        return 200, {"keys": [{**key, "kid": self._kid, "alg": "RS256", "use": "sig"}]}
+
+    def _post_token(self, request, query):
+        form = _form(request)
+        grant_type = form.get("grant_type")
+
+        if grant_type == UMA_TICKET_GRANT:
+            return self._uma_ticket(request, form)
+
+        client_id = self._authenticate_client(form)
+
+        if grant_type == "client_credentials":
+            claims = {
+                "aud": ["account"],
+                "sub": f"service-account-{client_id}",
+                "azp": client_id,
+                "clientId": client_id,
+                "preferred_username": f"service-account-{client_id}",
+            }
+            return 200, self._token_response(self._sign(claims), claims)
+
+        if grant_type == "password":
+            user = self._user_by_username(form.get("username", ""))
+            if not user or self.passwords[user["username"]] != form.get("password"):
+                raise StubError(401, "invalid_grant", "Invalid user credentials")
+            return 200, self._user_tokens(user, client_id)
+
+        if grant_type == "refresh_token":
+            claims = self._verify(form.get("refresh_token", ""))
+            if not claims or claims.get("typ") != "Refresh":
+                raise StubError(400, "invalid_grant", "Invalid refresh token")
+            user = self.users.get(claims["sub"])
+            if not user:
+                raise StubError(400, "invalid_grant", "User not found")
+            return 200, self._user_tokens(user, client_id)
+
+        raise StubError(400, "unsupported_grant_type")
+
+    def _post_introspect(self, request, query):
+        form = _form(request)
+        self._authenticate_client(form)
+        claims = self._verify(form.get("token", ""))
+        if not claims or claims.get("typ") != "Bearer":
+            return 200, {"active": False}
+        return 200, {
+            **claims,
+            "active": True,
+            "username": claims["preferred_username"],
+            "client_id": claims["azp"],
+        }
+
+    def _uma_ticket(self, request, form):
+        claims = self._bearer_claims(request)
+        audience = form.get("audience")
+        subject = self._subject(claims)
+
+        requested = [
+            permission.split("#", 1) for permission in _form(request, multi=True)
+        ]
+        granted = self._granted_permissions(subject, requested)
+
+        if form.get("response_mode") == "decision":
+            if requested and all(
+                self._is_granted(subject, name, scope) for name, scope in requested
+            ):
+                return 200, {"result": True}
+            raise StubError(403, "access_denied", "not_authorized")
+
+        if not granted:
+            raise StubError(403, "access_denied", "not_authorized")
+
+        rpt = self._sign(
+            {
+                "aud": audience,
+                "sub": claims["sub"],
+                "azp": claims["azp"],
+                "preferred_username": claims["preferred_username"],
+                "authorization": {"permissions": granted},
+            }
+        )
+        return 200, {"access_token": rpt, "token_type": "Bearer", "upgraded": False}
+
+    def _subject(self, claims):
+        """Return the username, group paths and client of a token's owner."""
+        user = self.users.get(claims["sub"])
+        groups = {
+            self.groups[group_id]["path"]
+            for group_id, members in self.members.items()
+            if user and user["id"] in members
+        }
+        return claims["preferred_username"], groups, claims["azp"]
+
+    def _grants(self, subject, policy):
+        username, groups, client_id = subject
+        return (
+            username in policy["users"]
+            or bool(groups & set(policy["groups"]))
+            or client_id in policy["clients"]
+        )
+
+    def _granted_scopes(self, subject, resource_id):
+        return {
+            scope
+            for policy in self.policies.values()
+            if policy["resource"] == resource_id and self._grants(subject, policy)
+            for scope in policy["scopes"]
+        }
+
+    def _is_granted(self, subject, resource, scope):
+        if not resource:
+            if subject[0] in self.scope_grants.get(scope, ()):
+                return True
+            return any(
+                scope in self._granted_scopes(subject, resource_id)
+                for resource_id in self.resources
+            )
+
+        for resource_id, rep in self.resources.items():
+            if resource in (resource_id, rep["name"]):
+                return scope in self._granted_scopes(subject, resource_id)
+        raise StubError(400, "invalid_resource", f"Resource with id [{resource}]")
+
+    def _granted_permissions(self, subject, requested):
+        """Return RPT permissions of `subject` for the `requested` scopes."""
+        requested_scopes = {scope for _, scope in requested}
+        permissions = []
+
+        for resource_id, resource in self.resources.items():
+            scopes = self._granted_scopes(subject, resource_id)
+            if requested_scopes:
+                scopes &= requested_scopes
+            if scopes:
+                permissions.append(
+                    {
+                        "rsid": resource_id,
+                        "rsname": resource["name"],
+                        "scopes": sorted(scopes),
+                    }
+                )
+
+        return permissions
+
+    def _get_resource_set(self, request, query):
+        self._bearer_claims(request)
+        name = query.get("name", "")
+        return 200, [
+            resource_id
+            for resource_id, resource in self.resources.items()
+            if name in resource["name"]
+        ]
+
+    def _post_resource_set(self, request, query):
+        self._bearer_claims(request)
+        body = json.loads(request.body)
+        if any(r["name"] == body["name"] for r in self.resources.values()):
+            raise StubError(409, "conflict", "Resource with name already exists")
+        resource_id = self.add_resource(body["name"], body.get("type"), body["scopes"])
+        return 201, self.resources[resource_id]
+
+    def _get_resource(self, request, query, id):
+        self._bearer_claims(request)
+        if id not in self.resources:
+            raise StubError(404, "not_found", "Resource not found")
+        return 200, self.resources[id]
+
+    def _delete_resource(self, request, query, id):
+        self._bearer_claims(request)
+        if self.resources.pop(id, None) is None:
+            raise StubError(404, "not_found", "Resource not found")
+        self.policies = {
+            policy_id: policy
+            for policy_id, policy in self.policies.items()
+            if policy["resource"] != id
+        }
+        return 204, None
+
+    def _policy_representation(self, policy):
+        return {
+            "id": policy["id"],
+            "name": policy["name"],
+            "description": policy["description"],
+            "type": "uma",
+            "scopes": policy["scopes"],
+            "logic": policy["logic"],
+            "decisionStrategy": policy["decisionStrategy"],
+            "owner": RESOURCE_SERVER_CLIENT_ID,
+            **{
+                kind: sorted(policy[kind])
+                for kind in ("users", "groups", "clients")
+                if policy[kind]
+            },
+        }
+
+    def _create_policy(self, resource_id, body):
+        if resource_id not in self.resources:
+            raise StubError(400, "invalid_resource")
+        if any(p["name"] == body["name"] for p in self.policies.values()):
+            raise StubError(409, "conflict", "Policy with name already exists")
+
+        policy = {
+            "id": str(uuid.uuid4()),
+            "resource": resource_id,
+            "logic": "POSITIVE",
+            "decisionStrategy": "UNANIMOUS",
+        }
+        self._apply_policy_body(policy, body)
+        self.policies[policy["id"]] = policy
+        return self._policy_representation(policy)
+
+    def _apply_policy_body(self, policy, body):
+        policy.update(
+            name=body["name"],
+            description=body.get("description", ""),
+            scopes=list(body.get("scopes", [])),
+            users=set(body.get("users") or ()),
+            groups={
+                group if group.startswith("/") else f"/{group}"
+                for group in body.get("groups") or ()
+            },
+            clients=set(body.get("clients") or ()),
+        )
+        policy["logic"] = body.get("logic", policy["logic"])
+        policy["decisionStrategy"] = body.get(
+            "decisionStrategy", policy["decisionStrategy"]
+        )
+
+    def _get_uma_policy(self, request, query):
+        self._bearer_claims(request)
+        policies = [
+            self._policy_representation(policy)
+            for policy in self.policies.values()
+            if query.get("name", "") in policy["name"]
+            and query.get("resource", policy["resource"]) == policy["resource"]
+            and ("scope" not in query or query["scope"] in policy["scopes"])
+        ]
+        return 200, _page(policies, query)
+
+    def _post_uma_policy(self, request, query, id):
+        self._bearer_claims(request)
+        return 200, self._create_policy(id, json.loads(request.body))
+
+    def _put_uma_policy(self, request, query, id):
+        self._bearer_claims(request)
+        if id not in self.policies:
+            raise StubError(404, "not_found", "Policy not found")
+        policy = self.policies[id]
+        self._apply_policy_body(policy, json.loads(request.body))
+
+        # Keycloak removes UMA policies that no longer grant anyone access.
+        if not (policy["users"] or policy["groups"] or policy["clients"]):
+            del self.policies[id]
+        return 204, None
+
+    def _delete_uma_policy(self, request, query, id):
+        self._bearer_claims(request)
+        if self.policies.pop(id, None) is None:
+            raise StubError(404, "not_found", "Policy not found")
+        return 204, None
+
+    def _brief_group(self, group):
+        return {
+            "id": group["id"],
+            "name": group["name"],
+            "path": group["path"],
+            "subGroups": [],
+        }
+
+    def _get_groups(self, request, query):
+        self._bearer_claims(request)
+        groups = list(self.groups.values())
+
+        if search := query.get("search"):
+            if query.get("exact", "").lower() == "true":
+                groups = [group for group in groups if group["name"] == search]
+            else:
+                groups = [
+                    group for group in groups if search.lower() in group["name"].lower()
+                ]
+
+        return 200, [self._brief_group(group) for group in _page(groups, query)]
+
+    def _get_group(self, request, query, id):
+        self._bearer_claims(request)
+        if id not in self.groups:
+            raise StubError(404, "Could not find group by id")
+        return 200, self.groups[id]
+
+    def _put_group(self, request, query, id):
+        self._bearer_claims(request)
+        if id not in self.groups:
+            raise StubError(404, "Could not find group by id")
+
+        body = json.loads(request.body)
+        name = body.get("name", self.groups[id]["name"])
+        if any(g["name"] == name and g["id"] != id for g in self.groups.values()):
+            raise StubError(409, "Top level group named '{}' already exists.")
+
+        self.groups[id] = {
+            **self.groups[id],
+            "name": name,
+            "path": f"/{name}",
+            "attributes": body.get("attributes", self.groups[id]["attributes"]),
+        }
+        return 204, None
+
+    def _get_group_members(self, request, query, id):
+        self._bearer_claims(request)
+        if id not in self.groups:
+            raise StubError(404, "Could not find group by id")
+        members = [
+            self.users[user_id]
+            for user_id in sorted(
+                self.members[id], key=lambda user_id: self.users[user_id]["username"]
+            )
+        ]
+        return 200, _page(members, query)
+
+    def _get_users(self, request, query):
+        self._bearer_claims(request)
+        users = list(self.users.values())
+
+        if username := query.get("username"):
+            if query.get("exact", "").lower() == "true":
+                users = [user for user in users if user["username"] == username]
+            else:
+                users = [user for user in users if username in user["username"]]
+
+        return 200, _page(users, query)
+
+    def _get_user_groups(self, request, query, id):
+        self._bearer_claims(request)
+        if id not in self.users:
+            raise StubError(404, "User not found")
+        return 200, _page(
+            [
+                self._brief_group(self.groups[group_id])
+                for group_id, members in self.members.items()
+                if id in members
+            ],
+            query,
+        )
+
+    def _put_user_groups(self, request, query, id, group_id):
+        self._bearer_claims(request)
+        if id not in self.users or group_id not in self.groups:
+            raise StubError(404, "Not found")
+        self.members[group_id].add(id)
+        return 204, None
+
+    def _delete_user_groups(self, request, query, id, group_id):
+        self._bearer_claims(request)
+        if id not in self.users or group_id not in self.groups:
+            raise StubError(404, "Not found")
+        self.members[group_id].discard(id)
+        return 204, None
+
+    def _get_role_groups(self, request, query, role):
+        self._bearer_claims(request)
+        groups = [
+            self._brief_group(group)
+            for group in self.groups.values()
+            if role in group["realmRoles"]
+        ]
+        if not groups:
+            raise StubError(404, "Could not find role")
+        return 200, _page(groups, query)
+
+
+def _form(request, multi=False):
+    """Return the form encoded body of `request`.
+
+    With `multi`, return every value of the `permission` field instead.
+    """
+    body = request.body or ""
+    if isinstance(body, bytes):
+        body = body.decode()
+    form = parse_qs(body)
+    if multi:
+        return form.get("permission", [])
+    return {k: v[-1] for k, v in form.items()}
+
+
+def _page(items, query):
+    first = int(query.get("first", 0))
+    if "max" in query:
+        return items[first : first + int(query["max"])]
+    return items[first:]
@@ -0,0 +1,132 @@
+import time
+
+import pytest
+from okdata.resource_auth import ResourceAuthorizer
+
+from models import OkdataPermission, User, UserType
+
+DATASET = "okdata:dataset:my-dataset"
+
+
+@pytest.fixture
+def stub(keycloak_stub):
+    stub = keycloak_stub
+    team = stub.add_group("TEAM-team1", attributes={"email": ["team1@example.org"]})
+    stub.add_user("janedoe", groups=[team], firstName="Jane", lastName="Doe")
+    stub.add_user("homersimpson")
+    stub.grant_scope("okdata:dataset:create", "janedoe")
+    return stub
+
+
+def test_resource_server(stub, stub_resource_server):
+    owner = User(user_id="janedoe", user_type=UserType.USER)
+    created = stub_resource_server.create_resource(DATASET, owner)
+    assert {p["name"] for p in created["permissions"]} == {
+        f"{DATASET}:read",
+        f"{DATASET}:write",
+        f"{DATASET}:update",
+        f"{DATASET}:admin",
+    }
+
+    permission = stub_resource_server.update_permission(
+        DATASET,
+        "okdata:dataset:read",
+        add_users=[User(user_id="team1", user_type=UserType.GROUP)],
+        remove_users=[owner],
+    )
+    assert permission["groups"] == ["/TEAM-team1"]
+    assert "users" not in permission
+    assert len(stub_resource_server.list_permissions(resource_name=DATASET)) == 4
+
+    user_permissions = stub_resource_server.get_user_permissions(
+        stub.token_for("janedoe"), "okdata:dataset:read"
+    )
+    assert user_permissions == [
+        {
+            "rsid": created["resource"]["_id"],
+            "rsname": DATASET,
+            "scopes": ["okdata:dataset:read"],
+        }
+    ]
+    assert stub.calls["uma_policy"] > 0
+    assert stub.calls["jwks"] > 0
+
+
+def test_resource_authorizer(stub):
+    resource_id = stub.add_resource(DATASET, "okdata:dataset", ["okdata:dataset:read"])
+    stub.add_permission(
+        f"{DATASET}:read", resource_id, ["okdata:dataset:read"], groups=["TEAM-team1"]
+    )
+    authorizer = ResourceAuthorizer()
+
+    assert authorizer.has_access(
+        stub.token_for("janedoe"), "okdata:dataset:read", DATASET
+    )
+    assert not authorizer.has_access(
+        stub.token_for("homersimpson"), "okdata:dataset:read", DATASET
+    )
+    assert authorizer.has_access(stub.token_for("janedoe"), "okdata:dataset:create")
+    assert stub.calls["token"] == 3
+
+
+def test_teams_client(stub, stub_teams_client):
+    [team] = stub_teams_client.list_teams()
+    members = stub_teams_client.update_members(team["id"], ["homersimpson"])
+
+    assert [member["username"] for member in members] == ["homersimpson"]
+    assert stub_teams_client.user_team_ids("janedoe") == set()
+    assert stub_teams_client.user_team_ids("homersimpson") == {team["id"]}
+
+
+def test_app(stub, stub_client):
+    headers = {"Authorization": f"Bearer {stub.token_for('janedoe')}"}
+
+    response = stub_client.get("/teams", headers=headers)
+    assert response.status_code == 200
+    assert [team["name"] for team in response.json()] == ["team1"]
+
+    response = stub_client.get(
+        f"/teams/{response.json()[0]['id']}/members", headers=headers
+    )
+    assert response.json() == [
+        {"username": "janedoe", "name": "Jane Doe", "email": None}
+    ]
+
+    assert stub_client.get("/my_permissions", headers=headers).json() == {}
+    assert stub.calls["introspect"] == 3
+
+
+def test_get_permissions(stub, stub_client, stub_resource_server):
+    stub_resource_server.create_resource(
+        DATASET, User(user_id="janedoe", user_type=UserType.USER)
+    )
+    stub.grant_scope("keycloak:resource:admin", "janedoe")
+    headers = {"Authorization": f"Bearer {stub.token_for('janedoe')}"}
+
+    response = stub_client.get(f"/permissions/{DATASET}", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    # Rendered by the route itself, but as if validated by its response model.
+    assert response.json() == [
+        OkdataPermission.from_uma_permission(p).dict()
+        for p in stub_resource_server.list_permissions(DATASET)
+    ]
+    assert {p["scope"] for p in response.json()} == {
+        "okdata:dataset:read",
+        "okdata:dataset:write",
+        "okdata:dataset:update",
+        "okdata:dataset:admin",
+    }
+
+
+def test_invalid_token(stub, stub_client):
+    response = stub_client.get("/teams", headers={"Authorization": "Bearer foo"})
+    assert response.status_code == 401
+
+
+def test_latency(stub, stub_resource_server):
+    stub.latency = {"uma_policy": 0.05}
+    start = time.perf_counter()
+    stub_resource_server.list_permissions()
+    assert time.perf_counter() - start >= 0.05
@@ -2,7 +2,7 @@ from unittest.mock import patch
 
 import pytest
 
-from models import OkdataPermission
+from models import OkdataPermission, Team, TeamMember
 
 
 @pytest.fixture
@@ -34,3 +34,52 @@ def test_okdata_permission_from_uma_permission(uma_permission):
 def test_okdata_permission_from_uma_permission_unknown_scope(uma_permission):
     with pytest.raises(ValueError):
         OkdataPermission.from_uma_permission(uma_permission)
+
+
+def test_okdata_permission_from_uma_permission_without_validation(uma_permission):
+    validated = OkdataPermission.from_uma_permission(uma_permission)
+    trusted = OkdataPermission.from_uma_permission(uma_permission, validate=False)
+    assert trusted == validated
+    assert trusted.__fields_set__ == validated.__fields_set__
+
+
+@pytest.mark.parametrize(
+    "group",
+    [
+        {"id": "1", "name": "TEAM-foo", "is_member": True},
+        {
+            "id": "2",
+            "name": "TEAM-bar",
+            "is_member": False,
+            "path": "/TEAM-bar",
+            "attributes": {
+                "TEAM-email": ["bar@example.org"],
+                "TEAM-slack-url": ["https://example.slack.com/archives/bar"],
+                "other": ["ignored"],
+            },
+        },
+    ],
+)
+def test_team_from_keycloak(group):
+    validated = Team.parse_obj(group)
+    trusted = Team.from_keycloak(group)
+    for exclude_unset in [False, True]:
+        assert trusted.dict(by_alias=True, exclude_unset=exclude_unset) == (
+            validated.dict(by_alias=True, exclude_unset=exclude_unset)
+        )
+
+
+@pytest.mark.parametrize(
+    "user",
+    [
+        {"username": "janedoe", "firstName": "Jane", "lastName": "Doe"},
+        {"username": "homersimpson", "email": "homer@example.org", "enabled": True},
+    ],
+)
+def test_team_member_from_keycloak(user):
+    validated = TeamMember.parse_obj(user)
+    trusted = TeamMember.from_keycloak(user)
+    for exclude_unset in [False, True]:
+        assert trusted.dict(exclude_unset=exclude_unset) == (
+            validated.dict(exclude_unset=exclude_unset)
+        )
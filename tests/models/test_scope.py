@@ -5,6 +5,7 @@ import pytest
 from models.scope import (
     all_scopes,
     all_scopes_for_type,
+    is_known_scope,
     resource_type,
     scope_permission,
 )
@@ -28,6 +29,15 @@ def test_all_scopes_for_type():
         all_scopes_for_type("okdata:baz")
 
 
+def test_is_known_scope():
+    with patch("models.scope._SCOPES", _SCOPES):
+        assert is_known_scope("okdata:foo:p1")
+        assert not is_known_scope("okdata:dataset:read")
+
+    assert is_known_scope("okdata:dataset:read")
+    assert not is_known_scope("okdata:foo:p1")
+
+
 def test_resource_type():
     assert resource_type("namespace:type:permission") == "namespace:type"
 
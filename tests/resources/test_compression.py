@@ -0,0 +1,108 @@
+import base64
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mangum import Mangum
+
+from resources import compression
+from resources.compression import (
+    CompressedAPIGateway,
+    CompressionMiddleware,
+    accepted_encodings,
+)
+
+LISTING = [{"resource_name": f"okdata:dataset:dataset-{i}"} for i in range(100)]
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/large")
+    def large():
+        return LISTING
+
+    return app
+
+
+def get(client, path, accept_encoding):
+    return client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("") == set()
+    assert accepted_encodings("gzip, deflate") == {"gzip", "deflate"}
+    assert accepted_encodings("br;q=1.0, GZIP;q=0.5, *;q=0") == {"br", "gzip"}
+    assert accepted_encodings("gzip;q=0, identity") == {"identity"}
+    assert accepted_encodings("gzip;q=foo") == set()
+
+
+def test_gzip(app, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    with TestClient(app) as client:
+        response = get(client, "/large", "gzip, br")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.json() == LISTING
+    assert int(response.headers["Content-Length"]) < len(str(LISTING)) / 5
+
+
+def test_brotli(app):
+    pytest.importorskip("brotli")
+    with TestClient(app) as client:
+        response = get(client, "/large", "gzip, br")
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.json() == LISTING
+
+
+def test_not_accepted(app):
+    with TestClient(app) as client:
+        response = get(client, "/large", "identity")
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.json() == LISTING
+
+
+def test_below_minimum_size(app):
+    with TestClient(app) as client:
+        response = get(client, "/small", "gzip")
+
+    assert "Content-Encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+
+def test_compressed_api_gateway(app, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    handler = Mangum(app, custom_handlers=[CompressedAPIGateway], lifespan="off")
+    event = {
+        "resource": "/{proxy+}",
+        "path": "/large",
+        "httpMethod": "GET",
+        "headers": {"Accept-Encoding": "gzip", "Host": "example.org"},
+        "multiValueHeaders": {},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {"resourcePath": "/{proxy+}", "stage": "dev"},
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+    result = handler(event, {})
+
+    assert result["headers"]["content-encoding"] == "gzip"
+    assert result["isBase64Encoded"]
+    assert gzip.decompress(base64.b64decode(result["body"])) == (
+        get(TestClient(app), "/large", "identity").content
+    )
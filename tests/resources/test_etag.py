@@ -0,0 +1,122 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from resources import compression
+from resources.compression import CompressionMiddleware
+from resources.etag import ETagMiddleware, compute_etag, etag_matches
+
+TEAM = {"id": "team-1", "name": "team1", "is_member": True}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    @app.get("/teams/{team_id}")
+    def get_team(team_id: str):
+        if team_id != TEAM["id"]:
+            raise HTTPException(404)
+        return TEAM
+
+    @app.get("/teams")
+    def list_teams():
+        return StreamingResponse(iter([b'[{"id": ', b'"team-1"}]']))
+
+    @app.get("/count")
+    def count_teams():
+        return 1
+
+    @app.post("/teams")
+    def create_team():
+        return TEAM
+
+    return TestClient(app, headers={"Accept-Encoding": "identity"})
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"xyz", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", etag)
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches("", etag)
+
+
+def test_compute_etag():
+    assert compute_etag(b"foo") == compute_etag(b"foo")
+    assert compute_etag(b"foo") != compute_etag(b"bar")
+    assert compute_etag(b"foo").startswith('"')
+
+
+def test_etag(client):
+    response = client.get("/teams/team-1")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == compute_etag(response.content)
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_not_modified(client):
+    etag = client.get("/teams/team-1").headers["ETag"]
+
+    response = client.get("/teams/team-1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert "Content-Type" not in response.headers
+
+
+def test_modified(client):
+    response = client.get("/teams/team-1", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.json() == TEAM
+
+
+def test_no_etag_for_errors_and_writes(client):
+    assert "ETag" not in client.get("/teams/team-2").headers
+    assert "ETag" not in client.post("/teams").headers
+
+
+def test_weak_etag_when_compressed(client):
+    headers = {"Accept-Encoding": "gzip"}
+    response = client.get("/teams/team-1", headers=headers)
+    etag = response.headers["ETag"]
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert etag.startswith("W/")
+
+    response = client.get("/teams/team-1", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_strong_etag_when_not_compressed(client):
+    # Below the compression threshold, though the client accepts gzip.
+    headers = {"Accept-Encoding": "gzip"}
+    response = client.get("/count", headers=headers)
+    etag = response.headers["ETag"]
+
+    assert "Content-Encoding" not in response.headers
+    assert etag == compute_etag(response.content)
+
+    response = client.get("/count", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_streamed_response(client):
+    response = client.get("/teams")
+
+    assert response.content == b'[{"id": "team-1"}]'
+    assert response.headers["Content-Length"] == str(len(response.content))
+    assert response.headers["ETag"] == compute_etag(response.content)
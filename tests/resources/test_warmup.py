@@ -0,0 +1,79 @@
+import importlib
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from resources import warmup
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    started = threading.Barrier(2, timeout=5)
+
+    def task(name):
+        def _task(min_validity):
+            calls.append(name)
+            if name in {"a", "b"}:
+                # Only passes if both tasks run at the same time.
+                started.wait()
+
+        return _task
+
+    def failing_task(min_validity):
+        calls.append("c")
+        raise RuntimeError("Keycloak is down")
+
+    monkeypatch.setattr(warmup, "_warmed_up", False)
+    monkeypatch.setattr(
+        warmup, "WARM_UP_TASKS", {"a": task("a"), "b": task("b"), "c": failing_task}
+    )
+    return calls
+
+
+def test_warm_up(calls):
+    assert warmup.warm_up() == {"a": True, "b": True, "c": False}
+    assert sorted(calls) == ["a", "b", "c"]
+
+
+def test_warm_up_once(calls):
+    warmup.warm_up()
+    assert warmup.warm_up() is None
+    assert len(calls) == 3
+
+
+def test_warm_up_refresh(calls):
+    warmup.warm_up()
+    assert warmup.warm_up(refresh=True) == {"a": True, "b": True, "c": False}
+    assert len(calls) == 6
+
+
+def test_start_warm_up(calls):
+    warmup.start_warm_up().join(timeout=5)
+    assert sorted(calls) == ["a", "b", "c"]
+
+
+def test_lifespan_warms_up(calls):
+    # Like under Mangum, every lifespan serves a request, which the logging
+    # middleware expects.
+    with TestClient(app) as client:
+        assert sorted(calls) == ["a", "b", "c"]
+        client.get("/docs")
+
+    with TestClient(app) as client:
+        client.get("/docs")
+    assert len(calls) == 3
+
+
+def test_handler_warm_event(calls, monkeypatch):
+    monkeypatch.setenv("ROOT_PATH", "")
+    handler = importlib.import_module("handler")
+
+    handler.start_warm_up().join(timeout=5)
+    calls.clear()
+
+    # Warm events run the tasks again, to renew tokens.
+    assert handler.handler({"warm": True}, None) == {"warm": True}
+    assert sorted(calls) == ["a", "b", "c"]
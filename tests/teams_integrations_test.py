@@ -85,6 +85,33 @@ def test_list_teams_is_member(mock_client):
     assert teams["team3"]["is_member"]
 
 
+def test_list_all_teams_paginated(mock_client):
+    headers = auth_header(get_bearer_token_for_user(kc_config.janedoe))
+    team_names = []
+    cursor = ""
+
+    while cursor is not None:
+        response = mock_client.get(
+            f"/teams?include=all&limit=2&fields=name&cursor={cursor}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert all(team.keys() == {"name"} for team in response.json())
+        team_names.extend(team["name"] for team in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    unittest.TestCase().assertCountEqual(team_names, kc_config.teams)
+
+
+def test_list_teams_invalid_cursor(mock_client):
+    response = mock_client.get(
+        "/teams?cursor=abc",
+        headers=auth_header(get_bearer_token_for_user(kc_config.janedoe)),
+    )
+    assert response.status_code == 400
+    assert response.json() == {"message": "Invalid cursor"}
+
+
 def test_list_teams_filtered_by_role(mock_client):
     response = mock_client.get(
         "/teams",
@@ -126,6 +153,36 @@ def test_get_team(mock_client):
     }
 
 
+def test_get_teams_by_id(mock_client):
+    team1 = get_keycloak_group_by_name(team_name_to_group_name(kc_config.team1))
+    team2 = get_keycloak_group_by_name(team_name_to_group_name(kc_config.team2))
+    group = get_keycloak_group_by_name(kc_config.nonteamgroup)
+
+    response = mock_client.get(
+        f"/teams?ids={team1['id']},{team2['id']},{group['id']},8f8c9efad971e78b8d69",
+        headers=auth_header(get_bearer_token_for_user(kc_config.janedoe)),
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "teams": [
+            {
+                "id": team1["id"],
+                "name": kc_config.team1,
+                "is_member": True,
+                "attributes": {"email": [], "slack-url": []},
+            },
+            {
+                "id": team2["id"],
+                "name": kc_config.team2,
+                "is_member": False,
+                "attributes": {"email": [], "slack-url": []},
+            },
+        ],
+        "not_found": [group["id"], "8f8c9efad971e78b8d69"],
+    }
+
+
 def test_get_team_non_member(mock_client):
     team = get_keycloak_group_by_name(team_name_to_group_name(kc_config.team2))
 
@@ -317,6 +374,36 @@ def test_get_team_members(mock_client):
     ]
 
 
+def test_get_team_members_paginated(mock_client):
+    team = get_keycloak_group_by_name(team_name_to_group_name(kc_config.team1))
+    headers = auth_header(get_bearer_token_for_user(kc_config.janedoe))
+
+    response = mock_client.get(
+        f"/teams/{team['id']}/members?limit=1&fields=username", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == [{"username": "janedoe"}]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = mock_client.get(
+        f"/teams/{team['id']}/members?limit=1&cursor={cursor}", headers=headers
+    )
+    assert response.status_code == 200
+    assert [member["username"] for member in response.json()] == ["misty"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_team_members_invalid_fields(mock_client):
+    team = get_keycloak_group_by_name(team_name_to_group_name(kc_config.team1))
+
+    response = mock_client.get(
+        f"/teams/{team['id']}/members?fields=username,password",
+        headers=auth_header(get_bearer_token_for_user(kc_config.janedoe)),
+    )
+    assert response.status_code == 400
+    assert response.json() == {"message": "Unknown field(s): password"}
+
+
 def test_get_team_members_non_member(mock_client):
     team = get_keycloak_group_by_name(team_name_to_group_name(kc_config.team1))
 
@@ -583,6 +670,36 @@ def test_get_user_by_username_non_existent(mock_client):
     assert response.json()["message"] == "User not found"
 
 
+# POST /teams/users:lookup
+def test_lookup_users(mock_client):
+    response = mock_client.post(
+        "/teams/users:lookup",
+        headers=auth_header(get_bearer_token_for_user(kc_config.janedoe)),
+        json={"usernames": [kc_config.homersimpson, "misty", "foo"]},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "users": {
+            kc_config.homersimpson: {
+                "username": kc_config.homersimpson,
+                "name": None,
+                "email": None,
+            },
+            "misty": {
+                "username": "misty",
+                "name": "Misty Williams",
+                "email": None,
+            },
+        },
+        "not_found": ["foo"],
+    }
+
+
+def test_lookup_users_unauthenticated(mock_client):
+    response = mock_client.post("/teams/users:lookup", json={"usernames": ["foo"]})
+    assert response.status_code == 403
+
+
 # GET /teams/users/{username}/teams
 def test_list_teams_by_username(mock_client):
     response = mock_client.get(